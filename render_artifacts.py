@@ -0,0 +1,16 @@
+import argparse
+from sabre_dag_experiments.artifacts import render_directory
+'''
+    How to run:
+    python3 split_by_index.py --dt grid --d 4 --f example/ --qf benchmark/qaoa/qaoa_16_0.qasm --index 0 --artifacts snapshot
+    python3 render_artifacts.py --dir . --workers 4
+'''
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", dest="directory", type=str, default=".",
+        help="the folder holding the .artifact snapshots; images are written next to them")
+    parser.add_argument("--workers", dest="workers", type=int, default=1,
+        help="rendering processes, 0 for one per core")
+    args = parser.parse_args()
+    render_directory(args.directory, args.workers or None)
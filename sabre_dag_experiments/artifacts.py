@@ -0,0 +1,171 @@
+import io
+import multiprocessing
+import os
+import pickle
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# An image to render. ``kind`` selects the renderer, ``payload`` is a picklable
+# snapshot of what to draw and ``options`` go to the drawing call:
+#
+#   circuit        payload: QPY bytes of a QuantumCircuit, drawn with QuantumCircuit.draw
+#   circuit_dag    payload: QPY bytes of a QuantumCircuit, drawn as its DAGCircuit
+#   bidag          payload: CompactBiDAG, drawn as its BidirectionalDAGCircuit
+#   coupling_map   payload: tuple of (u, v) edges, drawn with CouplingMap.draw
+#
+# The circuit kinds take ``reverse=True`` to draw the circuit with its ops reversed.
+Artifact = namedtuple("Artifact", ("kind", "filename", "payload", "options"))
+
+ARTIFACT_SUFFIX = ".artifact"
+
+
+def _circuit_payload(circuit):
+  from qiskit import qpy
+
+  buffer = io.BytesIO()
+  qpy.dump(circuit, buffer)
+  return buffer.getvalue()
+
+
+def circuit_artifact(filename, circuit, **options):
+  return Artifact("circuit", filename, _circuit_payload(circuit), options)
+
+
+def circuit_dag_artifact(filename, circuit, **options):
+  return Artifact("circuit_dag", filename, _circuit_payload(circuit), options)
+
+
+def bidag_artifact(filename, dag, **options):
+  """Snapshot a BidirectionalDAGCircuit, or a ReversedBiDAG view of one."""
+  from sabre_dag_experiments.bidirectional_dag_circuit import BidirectionalDAGCircuit
+  from sabre_dag_experiments.compact_bidag import CompactBiDAG
+
+  if not isinstance(dag, BidirectionalDAGCircuit):
+    dag = dag.to_bidag()
+  return Artifact("bidag", filename, CompactBiDAG.from_bidag(dag), options)
+
+
+def coupling_map_artifact(filename, edges, **options):
+  return Artifact("coupling_map", filename, tuple(map(tuple, edges)), options)
+
+
+def render_artifact(artifact, directory="."):
+  """Draw ``artifact`` to ``directory``; all plotting imports happen here."""
+  path = os.path.join(directory, artifact.filename)
+  options = dict(artifact.options)
+  if artifact.kind in ("circuit", "circuit_dag"):
+    from qiskit import qpy
+    from qiskit.converters import circuit_to_dag
+
+    circuit = qpy.load(io.BytesIO(artifact.payload))[0]
+    if options.pop("reverse", False):
+      circuit = circuit.reverse_ops()
+    if artifact.kind == "circuit":
+      circuit.draw(filename=path, **options)
+    else:
+      circuit_to_dag(circuit).draw(filename=path, **options)
+  elif artifact.kind == "bidag":
+    image = artifact.payload.to_bidag().draw(**options)
+    image.save(path)
+  elif artifact.kind == "coupling_map":
+    from qiskit.transpiler import CouplingMap
+
+    image = CouplingMap(couplinglist=[list(edge) for edge in artifact.payload]).draw(**options)
+    image.save(path)
+  else:
+    raise ValueError(f"unknown artifact kind {artifact.kind!r}")
+  return path
+
+
+def _render_in_worker(artifact, directory):
+  # some qiskit exceptions cannot be unpickled, which would break the pool, so
+  # failures come back as messages
+  try:
+    render_artifact(artifact, directory)
+  except Exception as error:
+    return f"{type(error).__name__}: {error}"
+  return None
+
+
+class ArtifactSink:
+  """Receives the artifacts a run asks for.
+
+  Producers check ``enabled`` before building a snapshot, so a disabled sink
+  costs one attribute check per artifact and no drawing code is imported.
+  """
+
+  enabled = True
+
+  def add(self, artifact):
+    """Called with every Artifact the run produces."""
+
+  def close(self):
+    """Finish or release any outstanding work."""
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+
+class NullArtifactSink(ArtifactSink):
+  """Renders nothing; the default sink."""
+
+  enabled = False
+
+
+NULL_ARTIFACTS = NullArtifactSink()
+
+
+class BackgroundRenderer(ArtifactSink):
+  """Renders artifacts on a pool of worker processes while the run continues.
+
+  Workers are spawned, so neither matplotlib nor graphviz is imported into the
+  producing process. ``close`` waits for the outstanding images and reports the
+  ones that failed to render instead of raising.
+  """
+
+  def __init__(self, directory=".", workers=1):
+    self.directory = directory
+    self.workers = workers
+    self._executor = None
+    self._pending = []
+
+  def add(self, artifact):
+    if self._executor is None:
+      self._executor = ProcessPoolExecutor(max_workers=self.workers or os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+    self._pending.append((artifact.filename, self._executor.submit(_render_in_worker, artifact, self.directory)))
+
+  def close(self):
+    if self._executor is None:
+      return
+    for filename, future in self._pending:
+      error = future.result()
+      if error is not None:
+        print(f"Could not render {filename}: {error}", file=sys.stderr)
+    self._executor.shutdown()
+    self._executor = None
+    self._pending = []
+
+
+class SnapshotWriter(ArtifactSink):
+  """Pickles every artifact into ``directory`` to be rendered later by render_directory."""
+
+  def __init__(self, directory="."):
+    self.directory = directory
+
+  def add(self, artifact):
+    with open(os.path.join(self.directory, artifact.filename + ARTIFACT_SUFFIX), "wb") as file:
+      pickle.dump(artifact, file)
+
+
+def render_directory(directory=".", workers=1):
+  """Render every snapshot SnapshotWriter left in ``directory``."""
+  with BackgroundRenderer(directory, workers) as renderer:
+    for name in sorted(os.listdir(directory)):
+      if name.endswith(ARTIFACT_SUFFIX):
+        with open(os.path.join(directory, name), "rb") as file:
+          renderer.add(pickle.load(file))
+
@@ -0,0 +1,183 @@
+from qiskit import QuantumCircuit
+from sabre_dag_experiments.bidag_layout import BiDAGLayout
+from sabre_dag_experiments.compact_bidag import CompactBiDAG
+from sabre_dag_experiments.device_context import device_context
+from sabre_dag_experiments.routing_result import RoutingResult
+import random
+
+
+class ArrayBiDAGSabreSwap:
+  """BiDAGSabreSwap ('basic' heuristic) running on a CompactBiDAG.
+
+  The front layer, dependency tracking and layout are plain integer lists, so a
+  routing step does no DAGOpNode or rustworkx work. ``bidag`` may be a
+  CompactBiDAG so that repeated layout iterations only compile once.
+
+  There is no stall detection or release valve: given the same seed it returns
+  the same swaps and final mapping as a single 'basic' BiDAGSabreSwap trial only
+  as long as that trial never opens its release valve.
+  """
+
+  def __init__(self, bidag, coupling_map, initial_mapping, heuristic="basic", seed=None, trials=None):
+    if heuristic != "basic":
+      raise ValueError(f"ArrayBiDAGSabreSwap only supports the 'basic' heuristic, not {heuristic!r}")
+    if trials not in (None, 1):
+      raise ValueError(f"ArrayBiDAGSabreSwap runs a single trial, not {trials!r}")
+    self.dag = bidag if isinstance(bidag, CompactBiDAG) else CompactBiDAG.from_bidag(bidag)
+    self.num_qubits = self.dag.num_qubits
+    self.coupling_map = coupling_map
+    self.heuristic = heuristic
+    self.seed = seed
+    self.trials = trials
+    self.initial_mapping = initial_mapping
+
+    num_physical = max(self.coupling_map.size(), self.num_qubits)
+    context = device_context(self.coupling_map)
+    self.dist_matrix = context.dist_matrix
+    self._dist = self.dist_matrix.tolist()
+    # pad the shared adjacency with uncoupled qubits when the dag is wider than the device
+    padding = num_physical - context.num_physical
+    self._neighbors = list(context.neighbors) + [()] * padding
+    self._coupled = [row + [False] * padding for row in context.coupled.tolist()]
+    self._coupled += [[False] * num_physical for _ in range(padding)]
+
+  def run(self):
+    # route, then materialize the routed circuit
+    result = self.route()
+    return result.swap_list(), result.final_mapping(), result.circuit()
+
+  def route(self):
+    # count-only routing: records the swaps and, for each, the number of gates
+    # executed before it; the circuit is built lazily by RoutingResult.circuit()
+    rng = random.Random(self.seed)
+    dist, neighbors, coupled = self._dist, self._neighbors, self._coupled
+    q0 = self.dag.qubits[:, 0].tolist()
+    q1 = self.dag.qubits[:, 1].tolist()
+    succ_ptr = self.dag.succ_ptr.tolist()
+    succ_idx = self.dag.succ_idx.tolist()
+    remaining = self.dag.in_degrees().tolist()
+
+    v2p = [0] * len(neighbors)
+    p2v = [0] * len(neighbors)
+    for logical, physical in self.initial_mapping.items():
+      v2p[logical] = physical
+      p2v[physical] = logical
+
+    front = self.dag.front.tolist()
+    inserted_swaps = []
+    swap_positions = []
+    executed_count = 0
+
+    while front:
+      executed = []
+      blocked = []
+      for g in front:
+        b = q1[g]
+        if b < 0 or coupled[v2p[q0[g]]][v2p[b]]:
+          executed.append(g)
+        else:
+          blocked.append(g)
+
+      if executed:
+        executed_count += len(executed)
+        for g in executed:
+          for s in succ_idx[succ_ptr[g]:succ_ptr[g + 1]]:
+            remaining[s] -= 1
+            if remaining[s] == 0:
+              blocked.append(s)
+        front = blocked
+        continue
+
+      # every gate left in the front layer is a blocked two-qubit gate
+      front_targets = set()
+      for g in front:
+        front_targets.add(q0[g])
+        front_targets.add(q1[g])
+      swap_candidates = set()
+      for logical in front_targets:
+        physical = v2p[logical]
+        for n in neighbors[physical]:
+          swap_candidates.add((physical, n) if physical < n else (n, physical))
+
+      min_swap = []
+      best_score = float("inf")
+      for swap in swap_candidates:
+        p, q = swap
+        score = 0
+        for g in front:
+          Q_m, Q_n = v2p[q0[g]], v2p[q1[g]]
+          Q_m = q if Q_m == p else p if Q_m == q else Q_m
+          Q_n = q if Q_n == p else p if Q_n == q else Q_n
+          score += dist[Q_m][Q_n]
+        if score < best_score:
+          best_score = score
+          min_swap = [swap]
+        elif score == best_score:
+          min_swap.append(swap)
+
+      chosen_swap = min_swap[rng.randint(0, len(min_swap) - 1)]
+      p, q = chosen_swap
+      l_p, l_q = p2v[p], p2v[q]
+      v2p[l_p], v2p[l_q] = q, p
+      p2v[p], p2v[q] = l_q, l_p
+      inserted_swaps.append(chosen_swap)
+      swap_positions.append(executed_count)
+
+    final_layout = BiDAGLayout.from_dict({k: v2p[k] for k in self.initial_mapping}, len(neighbors))
+    return RoutingResult(inserted_swaps, swap_positions, final_layout, self.initial_mapping, router=self)
+
+  def materialize(self, result):
+    # Rebuild the routed circuit by replaying a RoutingResult: the front layer
+    # advances exactly as during routing, and recorded swap i is applied once
+    # swap_positions[i] gates have executed.
+    q0 = self.dag.qubits[:, 0].tolist()
+    q1 = self.dag.qubits[:, 1].tolist()
+    succ_ptr = self.dag.succ_ptr.tolist()
+    succ_idx = self.dag.succ_idx.tolist()
+    remaining = self.dag.in_degrees().tolist()
+    coupled = self._coupled
+
+    v2p = [0] * len(self._neighbors)
+    p2v = [0] * len(self._neighbors)
+    for logical, physical in result.initial_mapping.items():
+      v2p[logical] = physical
+      p2v[physical] = logical
+
+    final_qc = QuantumCircuit(self.num_qubits)
+    swaps = result.swap_list()
+    positions = result.swap_positions.tolist()
+    next_swap = 0
+    executed_count = 0
+    front = self.dag.front.tolist()
+
+    while front:
+      if next_swap < len(swaps) and positions[next_swap] == executed_count:
+        p, q = swaps[next_swap]
+        l_p, l_q = p2v[p], p2v[q]
+        v2p[l_p], v2p[l_q] = q, p
+        p2v[p], p2v[q] = l_q, l_p
+        final_qc.swap(p, q)
+        next_swap += 1
+        continue
+      executed = []
+      blocked = []
+      for g in front:
+        b = q1[g]
+        if b < 0:
+          executed.append(g)
+          final_qc.h(q0[g])
+        elif coupled[v2p[q0[g]]][v2p[b]]:
+          executed.append(g)
+          final_qc.cx(q0[g], b)
+        else:
+          blocked.append(g)
+      if not executed:
+        raise RuntimeError("the routing result ends before every gate is executed")
+      executed_count += len(executed)
+      for g in executed:
+        for s in succ_idx[succ_ptr[g]:succ_ptr[g + 1]]:
+          remaining[s] -= 1
+          if remaining[s] == 0:
+            blocked.append(s)
+      front = blocked
+    return final_qc
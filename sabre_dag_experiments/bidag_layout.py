@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class BiDAGLayout:
+  """Virtual->physical qubit layout stored as a pair of inverse integer arrays.
+
+  ``v2p[v]`` is the physical qubit holding virtual qubit ``v`` and ``p2v[p]`` the
+  virtual qubit on physical qubit ``p`` (-1 if it is unoccupied). Lookups and swaps
+  are O(1) and happen in place; a swap is its own inverse, so a trial swap is
+  undone by swapping the same pair again. ``copy`` is a snapshot of the two arrays.
+  """
+
+  __slots__ = ("v2p", "p2v")
+
+  def __init__(self, v2p, p2v):
+    self.v2p = v2p
+    self.p2v = p2v
+
+  @classmethod
+  def from_dict(cls, mapping, num_physical=None):
+    """Build a layout from a {virtual: physical} dict."""
+    num_virtual = max(mapping.keys(), default=-1) + 1
+    if num_physical is None:
+      num_physical = max(mapping.values(), default=-1) + 1
+    v2p = np.full(num_virtual, -1, dtype=np.intp)
+    p2v = np.full(num_physical, -1, dtype=np.intp)
+    for virtual, physical in mapping.items():
+      v2p[virtual] = physical
+      p2v[physical] = virtual
+    return cls(v2p, p2v)
+
+  def to_dict(self):
+    """Return the layout as a {virtual: physical} dict of ints."""
+    return {v: p for v, p in enumerate(self.v2p.tolist()) if p >= 0}
+
+  def copy(self):
+    return BiDAGLayout(self.v2p.copy(), self.p2v.copy())
+
+  def physical(self, virtual):
+    return self.v2p[virtual]
+
+  def virtual(self, physical):
+    return self.p2v[physical]
+
+  def swap(self, physical_q1, physical_q2):
+    """Exchange the virtual qubits on two physical qubits."""
+    p2v = self.p2v
+    logical_q1, logical_q2 = p2v[physical_q1], p2v[physical_q2]
+    p2v[physical_q1], p2v[physical_q2] = logical_q2, logical_q1
+    if logical_q1 >= 0:
+      self.v2p[logical_q1] = physical_q2
+    if logical_q2 >= 0:
+      self.v2p[logical_q2] = physical_q1
+
+  def undo(self, physical_q1, physical_q2):
+    """Revert ``swap(physical_q1, physical_q2)``."""
+    self.swap(physical_q1, physical_q2)
+
+  def __eq__(self, other):
+    return isinstance(other, BiDAGLayout) and np.array_equal(self.v2p, other.v2p) and np.array_equal(self.p2v, other.p2v)
+
+  def __repr__(self):
+    return f"BiDAGLayout({self.to_dict()})"
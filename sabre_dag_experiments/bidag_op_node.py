@@ -27,10 +27,20 @@ from qiskit.circuit import (
     SwitchCaseOp,
     ForLoopOp,
     Parameter,
+    Instruction,
 )
 from qiskit.circuit.classical import expr
 
 
+# Operations shared by every op node of a lightweight dag (see
+# BidirectionalDAGCircuit.from_gate_list), keyed by number of qubits. They must not
+# be mutated in place; DAGOpNode.name copies a shared op before renaming it.
+SHARED_OPS = {
+    1: Instruction(name="h", num_qubits=1, num_clbits=0, params=[]),
+    2: Instruction(name="cx", num_qubits=2, num_clbits=0, params=[]),
+}
+
+
 def _legacy_condition_eq(cond1, cond2, bit_indices1, bit_indices2):
     if cond1 is cond2 is None:
         return True
@@ -252,27 +262,49 @@ class DAGNode:
 class DAGOpNode(DAGNode):
     """Object to represent an Instruction at a node in the DAGCircuit."""
 
-    __slots__ = ["op", "qargs", "cargs", "sort_key"]
+    __slots__ = ["op", "qargs", "cargs", "qubit_indices", "_sort_key", "in_degree", "out_degree"]
 
-    def __init__(self, op, left, qargs: Iterable[Qubit] = (), cargs: Iterable[Clbit] = (), dag=None):
+    def __init__(self, op, left, qargs: Iterable[Qubit] = (), cargs: Iterable[Clbit] = (), dag=None, qubit_indices=None):
         """Create an Instruction node"""
         super().__init__()
         self.op = op
         self.left = left
+        # number of DAGOpNode parents and children, maintained by the dag
+        self.in_degree = 0
+        self.out_degree = 0
         self.qargs = tuple(qargs)
         self.cargs = tuple(cargs)
+        self._sort_key = None
         if dag is not None:
-            cache_key = (self.qargs, self.cargs)
-            key = dag._key_cache.get(cache_key, None)
-            if key is not None:
-                self.sort_key = key
-            else:
-                self.sort_key = ",".join(
-                    f"{dag.find_bit(q).index:04d}" for q in itertools.chain(*cache_key)
-                )
-                dag._key_cache[cache_key] = self.sort_key
+            # positions of qargs in dag.qubits; callers that know them may pass them in
+            if qubit_indices is None:
+                qubit_indices = tuple(dag.find_bit(q).index for q in self.qargs)
+            self.qubit_indices = tuple(qubit_indices)
+            if self.cargs:
+                cache_key = (self.qargs, self.cargs)
+                key = dag._key_cache.get(cache_key, None)
+                if key is not None:
+                    self._sort_key = key
+                else:
+                    self._sort_key = ",".join(
+                        f"{dag.find_bit(q).index:04d}" for q in itertools.chain(*cache_key)
+                    )
+                    dag._key_cache[cache_key] = self._sort_key
+            # otherwise the key only depends on qubit_indices and is built on first use
         else:
-            self.sort_key = str(self.qargs)
+            self.qubit_indices = None if qubit_indices is None else tuple(qubit_indices)
+            self._sort_key = str(self.qargs)
+
+    @property
+    def sort_key(self):
+        """String key used to break ties in topological sorts."""
+        if self._sort_key is None:
+            self._sort_key = ",".join(f"{index:04d}" for index in self.qubit_indices)
+        return self._sort_key
+
+    @sort_key.setter
+    def sort_key(self, key):
+        self._sort_key = key
 
     @property
     def name(self):
@@ -282,6 +314,8 @@ class DAGOpNode(DAGNode):
     @name.setter
     def name(self, new_name):
         """Sets the Instruction name corresponding to the op for this node"""
+        if any(self.op is shared for shared in SHARED_OPS.values()):
+            self.op = self.op.copy()
         self.op.name = new_name
 
     def __repr__(self):
@@ -1,9 +1,19 @@
 from qiskit._accelerate.nlayout import NLayout
 from qiskit import QuantumRegister, QuantumCircuit
 from sabre_dag_experiments.bidag_op_node import DAGOpNode
+from sabre_dag_experiments.bidag_layout import BiDAGLayout
+from sabre_dag_experiments.swap_scoring import DeltaCost, batch_score_swaps
+from sabre_dag_experiments.routing_result import RoutingResult
+from sabre_dag_experiments.routing_trace import NULL_SINK, StepEvent
+from sabre_dag_experiments.device_context import device_context, zobrist_table
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import copy
+import multiprocessing
 import numpy as np
+import os
 import random
-import copy
+import sys
 
 import rustworkx
 from qiskit._accelerate.sabre_swap import (
@@ -13,26 +23,87 @@ from qiskit._accelerate.sabre_swap import (
     SabreDAG,
 )
 
+HEURISTICS = ("basic", "lookahead", "decay")
+SCORING_MODES = ("full", "delta", "vectorized")
+
+EXTENDED_SET_SIZE = 20  # Size of lookahead window. Same default as Qiskit's SabreSwap.
+EXTENDED_SET_WEIGHT = 0.5  # Weight of lookahead window compared to front_layer.
+
+DECAY_RATE = 0.001  # Decay coefficient for penalizing serial swaps.
+DECAY_RESET_INTERVAL = 5  # How often to reset all decay rates to 1.
+
+STALL_SWAPS_PER_QUBIT = 10  # Swaps without progress, per qubit, before the release valve opens.
+
+
+# Process-pool workers receive the router once, through the pool initializer,
+# and then only a trial seed per task.
+_worker_router = None
+
+def _init_trial_worker(router):
+  global _worker_router
+  _worker_router = router
+
+def _run_trial_in_worker(seed):
+  return _worker_router.run_trial(seed, _worker_router.swap_budget)
+
+def _gil_enabled():
+  return getattr(sys, "_is_gil_enabled", lambda: True)()
+
 class BiDAGSabreSwap:
 
-  def __init__(self, bidag, coupling_map, initial_mapping, heuristic="basic", seed=None, trials=None):
+  def __init__(self, bidag, coupling_map, initial_mapping, heuristic="basic", seed=None, trials=None, scoring="full",
+               extended_set_size=EXTENDED_SET_SIZE, extended_set_weight=EXTENDED_SET_WEIGHT,
+               decay_rate=DECAY_RATE, decay_reset_interval=DECAY_RESET_INTERVAL, workers=1,
+               trace=None, max_stalled_swaps=None, swap_budget=None):
     # SET VARIABLES
     self.bidag = bidag
     self.num_qubits = bidag.num_qubits()
     self.coupling_map = coupling_map
+    if heuristic not in HEURISTICS:
+      raise ValueError(f"unknown heuristic {heuristic!r}, expected one of {HEURISTICS}")
     self.heuristic = heuristic
-    random.seed(seed)
+    # 'lookahead' and 'decay' also score the next extended_set_size two-qubit gates
+    # past the front layer, on both the left and right halves of the BiDAG
+    self.extended_set_size = extended_set_size
+    self.extended_set_weight = extended_set_weight
+    # 'decay' multiplies the lookahead score by the larger decay of the two swapped
+    # physical qubits; each swap raises its qubits' decay by decay_rate, and all
+    # decays return to 1 after decay_reset_interval swaps or when a gate executes
+    self.decay_rate = decay_rate
+    self.decay_reset_interval = decay_reset_interval
+    # 'full' rescores every front-layer gate per candidate swap, 'delta' keeps the
+    # front-layer cost and rescores only the gates on the two swapped qubits,
+    # 'vectorized' scores all candidates at once with NumPy
+    if scoring not in SCORING_MODES:
+      raise ValueError(f"unknown scoring mode {scoring!r}, expected one of {SCORING_MODES}")
+    self.scoring = scoring
+    # run() routes `trials` times, each trial with its own RNG, and keeps the trial
+    # with the fewest swaps; trials are spread over `workers` processes (threads
+    # when the GIL is disabled), None or 0 for one per core
+    self.seed = seed
     self.trials = trials
-
-    # COMPUTE DISTANCE MATRIX
-    self.dist_matrix = self.coupling_map.distance_matrix
-    print("distance matrix:")
-    print(self.dist_matrix)
-
-    # CREATE NEIGHBOR TABLE
-    self.neighbor_table = self.create_neighbor_table(self.coupling_map.graph)
-    print("neighbor table")
-    print(self.neighbor_table)
+    self.workers = workers
+    # routing events go to a TraceSink (see routing_trace); the default NullSink
+    # is disabled and no events are built
+    self.trace = trace if trace is not None else NULL_SINK
+    # Routing is stalled once max_stalled_swaps swaps go by without executing a gate,
+    # or a swap revisits a layout seen since the last gate executed; the release
+    # valve then walks the closest front-layer gate together along a shortest path.
+    self.max_stalled_swaps = max_stalled_swaps if max_stalled_swaps is not None else STALL_SWAPS_PER_QUBIT * self.num_qubits
+    # With a swap_budget, a trial is aborted once it inserts more swaps than the
+    # budget; trials run in this process are also cut off as soon as they can no
+    # longer beat the best finished trial. Pass math.inf for the latter alone.
+    self.swap_budget = swap_budget
+
+    # DISTANCE MATRIX, ADJACENCY LISTS, COUPLING LOOKUP AND ZOBRIST KEYS, shared by all
+    # routers on this device; zobrist[v][Q] hashes virtual v on physical Q into the layout hash
+    context = device_context(self.coupling_map)
+    self.dist_matrix = context.dist_matrix
+    if self.num_qubits <= context.num_physical:
+      self.coupled, self.neighbors, self.zobrist = context.coupled, context.neighbors, context.zobrist
+    else:
+      self.coupled, self.neighbors = self.create_adjacency(self.coupling_map.graph)
+      self.zobrist = zobrist_table(len(self.neighbors))
           
     self.restarts = 0
 
@@ -61,120 +132,302 @@ class BiDAGSabreSwap:
 
   def restart(self, swap):
     F = self.initialize_front_layer()
-    new_mapping = self.execute_swap(swap, self.initial_mapping)
+    layout = BiDAGLayout.from_dict(self.initial_mapping, self.coupling_map.size())
+    self.execute_swap(swap, layout)
     self.restarts = self.restarts + 1
-    return F, new_mapping
+    return F, layout
   
+  def trial_seeds(self):
+    # trial i is seeded with seed + i, so a single trial reproduces seed exactly
+    num_trials = self.trials or 1
+    base = self.seed if self.seed is not None else random.SystemRandom().randrange(2**32)
+    return [base + i for i in range(num_trials)]
+
   def run(self):
+    # route, then materialize the routed circuit of the best trial
+    result = self.route()
+    if result.aborted:
+      raise RuntimeError(f"every routing trial exceeded the swap budget of {self.swap_budget}")
+    return result.swap_list(), result.final_mapping(), result.circuit()
+
+  def route(self):
+    # count-only routing: returns a RoutingResult holding the swaps and final
+    # layout; the routed circuit is built lazily by RoutingResult.circuit()
+    seeds = self.trial_seeds()
+    workers = min(self.workers or os.cpu_count() or 1, len(seeds))
+    if self.trace.enabled:
+      # sinks live in this process, so traced trials run here
+      workers = 1
+    if workers <= 1:
+      results = []
+      budget = self.swap_budget
+      for seed in seeds:
+        result = self.run_trial(seed, budget)
+        results.append(result)
+        if budget is not None and not result.aborted:
+          # a later trial only wins with strictly fewer swaps
+          budget = min(budget, len(result) - 1)
+    elif not _gil_enabled():
+      with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda seed: copy.copy(self).run_trial(seed, self.swap_budget), seeds))
+    else:
+      # spawned, not forked: forking once Qiskit's Rust thread pool is running can deadlock the child
+      with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_trial_worker, initargs=(self,)) as executor:
+        results = list(executor.map(_run_trial_in_worker, seeds))
+
+    # results are in seed order, so ties go to the lowest trial index whatever the
+    # worker count; pruning only ever aborts trials that could not have won
+    best = results[min(range(len(results)), key=lambda i: (results[i].aborted, len(results[i])))]
+    best.router = self
+    return best
+
+  def run_trial(self, seed, swap_budget=None):
     # RUN SABRE ALGORITHM
+    self.rng = random.Random(seed)
 
     # CONSTRUCT FRONT LAYER AND OUTPUT VARIABLES
     F = self.initialize_front_layer()
-    self.mutable_mapping = self.initial_mapping.copy()
+    self.layout = BiDAGLayout.from_dict(self.initial_mapping, self.coupling_map.size())
 
-    print("mutable_mapping")
-    print(self.mutable_mapping)
-    final_mapping = None
+    self.initialize_scoring_state(F)
     inserted_swaps = []
-    self.executed_gates_set = set()
-
-    final_qc = QuantumCircuit(self.num_qubits)
+    swap_positions = []
+    self.remaining = self.bidag.op_in_degrees().tolist()
+    self.executed_count = 0
+    aborted = False
 
-    def extract_gate_qargs(node_list):
-      gates = []
-      for node in node_list:
-        if isinstance(node, DAGOpNode):
-          qubits = node.qargs
-          gate_idxs = tuple([q.index for q in qubits])
-          gates.append(gate_idxs)
+    # stall detection state, reset whenever a gate executes
+    self.layout_hash = self.hash_layout(self.layout)
+    stalled_swaps = 0
+    seen_layouts = {self.layout_hash}
 
-      return gates
+    trace = self.trace if self.trace.enabled else None
+    if trace is not None:
+      trace.start(self, seed)
+    step = 0
 
-    # for _ in range(10):
     while len(F) > 0: # while F is not empty:
-      print(f"F: {extract_gate_qargs(F)}")
       execute_gate_list = []
       for gate in F:
         if self.can_execute_gate(gate):
-          # print('can execute')
           execute_gate_list.append(gate)
-          if len(gate.qargs) == 1:
-            final_qc.h(gate.qargs[0].index)
-          else:
-            final_qc.cx(gate.qargs[0].index, gate.qargs[1].index)
-      print(f"execute_gate_list: {extract_gate_qargs(execute_gate_list)}")
       if len(execute_gate_list) > 0:
+        if trace is not None:
+          trace.step(StepEvent(seed, step, self.gate_qubits(F), self.gate_qubits(execute_gate_list), (), (), None, None))
+        self.reset_decay()
+        stalled_swaps = 0
+        seen_layouts.clear()
         for gate in execute_gate_list:
           F.remove(gate)
-          # if gate in self.executed_gates_set:
-          #   print("looks like gate uniqueness is not IDed")
-          self.executed_gates_set.add(gate)
-          print(f'removing gate {extract_gate_qargs([gate])}')
+          self.untrack_front_gate(gate)
+          self.executed_count += 1
           successors = self.get_successors(gate)
-          print(f'successors: {extract_gate_qargs(successors)}')
           for s in successors:
-            print(f"parents of successor {extract_gate_qargs([s])}: {extract_gate_qargs(s.parents)}")
+            self.remaining[s._node_id] -= 1
             if self.has_resolved_dependencies(s):
-              print(f"successor {extract_gate_qargs([s])} has resolved dependencies")
               F.append(s)
+              self.track_front_gate(s)
+        self.refill_extended_set()
       else:
         F_targets = self.get_F_targets(F)
         swap_candidate_list = self.obtain_swaps(F_targets)
-        print("swap candidates")
-        print(swap_candidate_list)
-        min_swap = [] # initialize
-        best_score = float("inf") # initialize
-        best_mapping = self.mutable_mapping
-        
-        for swap in swap_candidate_list:
-          score, new_mapping = self.score_temp_mapping(swap, self.mutable_mapping, F)
-          if score < best_score:
-            best_score = score
-            min_swap = [swap]
-            best_mapping = [new_mapping]
-          elif score == best_score:
-            min_swap.append(swap)
-            best_mapping.append(new_mapping)
-        # print("old mapping")
-        # print(self.mutable_mapping)
-        chosen_idx = random.randint(0, len(min_swap) - 1)
-        chosen_mapping = best_mapping[chosen_idx]
+        min_swap = self.find_min_swaps(swap_candidate_list, F)
+        chosen_idx = self.rng.randint(0, len(min_swap) - 1)
         chosen_swap = min_swap[chosen_idx]
-        print(f"chosen swap: {chosen_swap}")
-        print("new mapping")
-        print(chosen_mapping)
-
-        # Remove this and replace with post-processing
-        # if len(self.executed_gates_set) == 0 and self.restarts <= 10:
-        #   print("swap required before any gates have been able to execute. Restart the process")
-        #   print(f"")
-        #   F, self.mutable_mapping = self.restart(chosen_swap)
-        # else:
-        self.mutable_mapping = chosen_mapping
-        inserted_swaps.append(chosen_swap)
-        final_qc.swap(chosen_swap[0], chosen_swap[1])
-
-    return inserted_swaps, self.mutable_mapping, final_qc
-
-  def create_neighbor_table(self, graph):
-    neighbor_table = np.zeros((self.num_qubits, self.num_qubits))
-    edges = graph.edge_list()
-    for u, v in edges:
-      neighbor_table[u, v] += 1
+        self.apply_chosen_swap(chosen_swap, inserted_swaps, swap_positions)
+        if trace is not None:
+          trace.step(StepEvent(seed, step, self.gate_qubits(F), (), tuple(swap_candidate_list), tuple(min_swap), chosen_swap, self.layout.to_dict()))
+
+        stalled_swaps += 1
+        if stalled_swaps >= self.max_stalled_swaps or self.layout_hash in seen_layouts:
+          for swap in self.release_valve(F, inserted_swaps, swap_positions):
+            if trace is not None:
+              trace.step(StepEvent(seed, step, self.gate_qubits(F), (), (), (), swap, self.layout.to_dict()))
+          stalled_swaps = 0
+          seen_layouts.clear()
+        seen_layouts.add(self.layout_hash)
+
+        if swap_budget is not None and len(inserted_swaps) > swap_budget:
+          aborted = True
+          break
+      step += 1
+
+    result = RoutingResult(inserted_swaps, swap_positions, self.layout, self.initial_mapping, router=self, aborted=aborted)
+    if trace is not None:
+      trace.finish(result)
+    return result
+
+  def apply_chosen_swap(self, swap, inserted_swaps, swap_positions):
+    # commit a swap to the layout, the incremental scores and the layout hash
+    if self.front_cost is not None:
+      self.front_cost.apply(swap, self.layout)
+    if self.extended_cost is not None:
+      self.extended_cost.apply(swap, self.layout)
+    for Q_from, Q_to in (swap, swap[::-1]):
+      logical = self.layout.p2v[Q_from]
+      if logical >= 0:
+        self.layout_hash ^= self.zobrist[logical][Q_from] ^ self.zobrist[logical][Q_to]
+    self.execute_swap(swap, self.layout)
+    self.update_decay(swap)
+    inserted_swaps.append(swap)
+    swap_positions.append(self.executed_count)
+
+  def hash_layout(self, layout):
+    layout_hash = 0
+    for logical, physical in enumerate(layout.v2p.tolist()):
+      if physical >= 0:
+        layout_hash ^= self.zobrist[logical][physical]
+    return layout_hash
+
+  def release_valve(self, F, inserted_swaps, swap_positions):
+    # Break a stall by moving the closest front-layer gate's first qubit along a
+    # shortest path in dist_matrix until the gate is executable.
+    v2p = self.layout.v2p
+    gate = min(F, key=lambda g: self.dist_matrix[v2p[g.qubit_indices[0]], v2p[g.qubit_indices[1]]])
+    Q_m, Q_n = v2p[gate.qubit_indices[0]], v2p[gate.qubit_indices[1]]
+    valve_swaps = []
+    while not self.coupled[Q_m, Q_n]:
+      Q_next = next(n for n in self.neighbors[Q_m] if self.dist_matrix[n, Q_n] < self.dist_matrix[Q_m, Q_n])
+      swap = (Q_m, Q_next) if Q_m < Q_next else (Q_next, Q_m)
+      self.apply_chosen_swap(swap, inserted_swaps, swap_positions)
+      valve_swaps.append(swap)
+      Q_m = Q_next
+    return valve_swaps
+
+  def materialize(self, result):
+    # Rebuild the routed circuit by replaying a RoutingResult: the front layer
+    # advances exactly as during routing, and recorded swap i is applied once
+    # swap_positions[i] gates have executed.
+    F = self.initialize_front_layer()
+    self.layout = BiDAGLayout.from_dict(result.initial_mapping, self.coupling_map.size())
+    self.remaining = self.bidag.op_in_degrees().tolist()
+    self.executed_count = 0
+    final_qc = QuantumCircuit(self.num_qubits)
+    swaps = result.swap_list()
+    positions = result.swap_positions.tolist()
+    next_swap = 0
+
+    while len(F) > 0:
+      if next_swap < len(swaps) and positions[next_swap] == self.executed_count:
+        self.execute_swap(swaps[next_swap], self.layout)
+        final_qc.swap(swaps[next_swap][0], swaps[next_swap][1])
+        next_swap += 1
+        continue
+      execute_gate_list = [gate for gate in F if self.can_execute_gate(gate)]
+      if not execute_gate_list and next_swap >= len(swaps):
+        # only a partial (aborted) routing runs out of swaps with gates left
+        raise RuntimeError("the routing result ends before every gate is executed")
+      for gate in execute_gate_list:
+        if len(gate.qargs) == 1:
+          final_qc.h(gate.qubit_indices[0])
+        else:
+          final_qc.cx(gate.qubit_indices[0], gate.qubit_indices[1])
+      for gate in execute_gate_list:
+        F.remove(gate)
+        self.executed_count += 1
+        for s in self.get_successors(gate):
+          self.remaining[s._node_id] -= 1
+          if self.has_resolved_dependencies(s):
+            F.append(s)
+    return final_qc
+
+  def create_adjacency(self, graph):
+    # coupled[Q_m, Q_n] is True iff the physical qubits share an edge (either direction);
+    # neighbors[Q_m] lists the physical neighbours of Q_m in ascending order
+    num_physical = max(self.coupling_map.size(), self.num_qubits)
+    coupled = np.zeros((num_physical, num_physical), dtype=bool)
+    for u, v in graph.edge_list():
       if u != v:
-        neighbor_table[v, u] += 1
-    return neighbor_table
+        coupled[u, v] = coupled[v, u] = True
+    neighbors = [tuple(np.flatnonzero(row).tolist()) for row in coupled]
+    return coupled, neighbors
   
   def get_F_targets(self, F):
     F_targets = set()
     for gate in F:
-      for qarg in gate.qargs:
-        F_targets.add(qarg.index)
+      F_targets.update(gate.qubit_indices)
     return F_targets
   
   def initialize_front_layer(self):
     front_layer = self.bidag.front_layer()
     return front_layer
+
+  def initialize_scoring_state(self, F):
+    self.front_cost = DeltaCost(self.dist_matrix) if self.scoring == "delta" else None
+
+    # The extended set is kept incrementally: extended_seen holds every gate already
+    # reached from the front layer, and extended_queue the gates whose successors
+    # still have to be walked (breadth first) when the set has room again.
+    self.extended_set = None
+    self.extended_cost = None
+    if self.heuristic != 'basic':
+      self.extended_set = {}
+      self.extended_seen = set()
+      self.extended_queue = deque()
+      if self.scoring == "delta":
+        self.extended_cost = DeltaCost(self.dist_matrix)
+
+    for gate in F:
+      self.track_front_gate(gate)
+    self.refill_extended_set()
+
+    self.decay = np.ones(max(self.coupling_map.size(), self.num_qubits))
+    self.decayed_qubits = []  # physical qubits whose decay is not 1
+    self.swaps_since_reset = 0
+
+  def reset_decay(self):
+    # only the qubits touched since the last reset differ from 1
+    for Q in self.decayed_qubits:
+      self.decay[Q] = 1.0
+    self.decayed_qubits.clear()
+    self.swaps_since_reset = 0
+
+  def update_decay(self, swap):
+    if self.heuristic != 'decay':
+      return
+    self.swaps_since_reset += 1
+    if self.swaps_since_reset % self.decay_reset_interval == 0:
+      self.reset_decay()
+    else:
+      self.decay[swap[0]] += self.decay_rate
+      self.decay[swap[1]] += self.decay_rate
+      self.decayed_qubits.extend(swap)
+
+  def track_front_gate(self, gate):
+    # called when a gate enters the front layer
+    if self.extended_set is not None:
+      if gate in self.extended_set:
+        del self.extended_set[gate]
+        if self.extended_cost is not None:
+          self.extended_cost.remove(gate, self.layout)
+      elif gate not in self.extended_seen:
+        self.extended_seen.add(gate)
+        self.extended_queue.append(gate)
+    if self.front_cost is not None and len(gate.qargs) == 2:
+      self.front_cost.add(gate, gate.qubit_indices[0], gate.qubit_indices[1], self.layout)
+
+  def refill_extended_set(self):
+    if self.extended_set is None:
+      return
+    extended_set, seen, queue = self.extended_set, self.extended_seen, self.extended_queue
+    while queue and len(extended_set) < self.extended_set_size:
+      for s in self.get_successors(queue[0]):
+        if s in seen:
+          continue
+        if len(s.qargs) == 2:
+          if len(extended_set) >= self.extended_set_size:
+            # leave queue[0] in place so its remaining successors are walked later
+            return
+          extended_set[s] = None
+          if self.extended_cost is not None:
+            self.extended_cost.add(s, s.qubit_indices[0], s.qubit_indices[1], self.layout)
+        seen.add(s)
+        queue.append(s)
+      queue.popleft()
+
+  def untrack_front_gate(self, gate):
+    if self.front_cost is not None and gate in self.front_cost:
+      self.front_cost.remove(gate, self.layout)
   
   def can_execute_gate(self, gate):
     # logical qubits
@@ -183,11 +436,11 @@ class BiDAGSabreSwap:
       return True
     else:
       # assume two-qubit gate
-      q_i, q_j = gate.qargs[0].index, gate.qargs[1].index
+      q_i, q_j = gate.qubit_indices[0], gate.qubit_indices[1]
       # print(q_i, q_j)
-      Q_m, Q_n = self.mutable_mapping[q_i], self.mutable_mapping[q_j]
+      Q_m, Q_n = self.layout.v2p[q_i], self.layout.v2p[q_j]
       # print(Q_m, Q_n)
-      return self.neighbor_table[Q_m, Q_n] == 1 or self.neighbor_table[Q_n, Q_m] == 1
+      return self.coupled[Q_m, Q_n]
 
   def get_successors(self, gate):
     # print(gate.__repr__())
@@ -198,13 +451,9 @@ class BiDAGSabreSwap:
     return succeeding_dag_op_nodes
 
   def has_resolved_dependencies(self, gate):
-    # check that there is no gate in F that operates on the same qubits as those executed on by gate
-    # print(gate.__repr__())
-
-    for parent in gate.parents:
-      if isinstance(parent, DAGOpNode) and parent not in self.executed_gates_set:
-        return False
-    return True
+    # remaining[id] starts at the gate's op-node in-degree and is decremented as
+    # each parent executes, so the gate is ready once it reaches zero
+    return self.remaining[gate._node_id] == 0
     
   def obtain_swaps(self, F_targets):
     # F is a list of DAGOpNodes
@@ -216,7 +465,7 @@ class BiDAGSabreSwap:
     for logical_target in F_targets:
       # assume two-qubit gate
       # print(type(logical_target))
-      physical_target = self.mutable_mapping[logical_target]
+      physical_target = self.layout.v2p[logical_target]
       neighbors = self.find_neighbors(physical_target)
       for n in neighbors:
         swap_candidate_set.add(tuple(sorted([physical_target, n])))
@@ -224,48 +473,83 @@ class BiDAGSabreSwap:
     return swap_candidate_set
 
   def find_neighbors(self, Q_m):
-    neighbors = []
-    for n in np.arange(self.num_qubits):
-      if self.neighbor_table[Q_m, n] == 1 or self.neighbor_table[n, Q_m] == 1:
-        neighbors.append(n)
-    # print(f"neighbors of {Q_m} are {neighbors}")
-    return neighbors
-  
-  def execute_swap(self, swap, mutable_mapping):
-    physical_q1, physical_q2 = swap
-
-    logical_q1, logical_q2 = None, None
-    for k, v in mutable_mapping.items():
-      if v == physical_q1:
-        logical_q1 = k
-      if v == physical_q2:
-        logical_q2 = k
-
-    new_mapping = copy.deepcopy(mutable_mapping)
-    # new_mapping = mutable_mapping.copy()
-    new_mapping[logical_q1] = physical_q2
-    new_mapping[logical_q2] = physical_q1
-    return new_mapping
-
+    return self.neighbors[Q_m]
   
-  def score_temp_mapping(self, swap, mutable_mapping, F):
-    new_mapping = self.execute_swap(swap, mutable_mapping)
+  def find_min_swaps(self, swap_candidate_list, F):
+    # returns the lowest-scoring candidates, in candidate order
+    if self.scoring == "vectorized":
+      swap_candidate_list = list(swap_candidate_list)
+      swap_candidates = np.array(swap_candidate_list, dtype=np.intp)
+      front_qubits = self.gate_qubit_array(F)
+      costs, ties = batch_score_swaps(swap_candidates, front_qubits, self.layout, self.dist_matrix)
+      if self.heuristic != 'basic':
+        extended_costs = None
+        if self.extended_set:
+          extended_qubits = self.gate_qubit_array(self.extended_set)
+          extended_costs, _ = batch_score_swaps(swap_candidates, extended_qubits, self.layout, self.dist_matrix)
+        costs = self.combine_costs(costs, extended_costs, len(F))
+        if self.heuristic == 'decay':
+          costs *= np.maximum(self.decay[swap_candidates[:, 0]], self.decay[swap_candidates[:, 1]])
+        ties = np.flatnonzero(costs == costs.min())
+      return [swap_candidate_list[i] for i in ties]
+
+    min_swap = [] # initialize
+    best_score = float("inf") # initialize
+    for swap in swap_candidate_list:
+      score = self.score_temp_mapping(swap, self.layout, F)
+      if score < best_score:
+        best_score = score
+        min_swap = [swap]
+      elif score == best_score:
+        min_swap.append(swap)
+    return min_swap
+
+  def execute_swap(self, swap, layout):
+    # swaps in place; applying the same swap again undoes it
+    layout.swap(swap[0], swap[1])
+
+  def score_temp_mapping(self, swap, layout, F):
+    extended_cost = None
+    if self.front_cost is not None:
+      front_cost = self.front_cost.score(swap, layout)
+      if self.extended_cost is not None and len(self.extended_cost) > 0:
+        extended_cost = self.extended_cost.score(swap, layout)
+    else:
+      # conduct swap, score it, then restore the layout
+      self.execute_swap(swap, layout)
+      front_cost = self.gate_set_cost(F, layout)
+      if self.extended_set:
+        extended_cost = self.gate_set_cost(self.extended_set, layout)
+      layout.undo(swap[0], swap[1])
+    cost = self.combine_costs(front_cost, extended_cost, len(F))
+    if self.heuristic == 'decay':
+      cost *= max(self.decay[swap[0]], self.decay[swap[1]])
+    return cost
+
+  def gate_set_cost(self, gates, layout):
     cost = 0
-    # conduct swap
+    v2p = layout.v2p
+    for gate in gates:
+      q_i, q_j = gate.qubit_indices[0], gate.qubit_indices[1]
+      Q_m, Q_n = v2p[q_i], v2p[q_j]
+      cost += self.dist_matrix[Q_m, Q_n]
+    return cost
+
+  def gate_qubits(self, gates):
+    return tuple(gate.qubit_indices for gate in gates)
+
+  def gate_qubit_array(self, gates):
+    return np.array([(gate.qubit_indices[0], gate.qubit_indices[1]) for gate in gates], dtype=np.intp)
+
+  def combine_costs(self, front_cost, extended_cost, front_size):
+    # 'basic' is the plain front-layer sum; 'lookahead' and 'decay' average each
+    # set and weight the extended set as Qiskit's SabreSwap does
     if self.heuristic == 'basic':
-      cost = 0
-      for gate in F:
-        q_i, q_j = gate.qargs[0].index, gate.qargs[1].index
-        Q_m, Q_n = new_mapping[q_i], new_mapping[q_j]
-        cost += self.dist_matrix[Q_m, Q_n]
-
-    elif self.heuristic == 'lookahead':
-      pass
-    elif self.heuristic == 'decay':
-      pass
-    else:
-      print("unknown heuristic option")
-    return cost, new_mapping
+      return front_cost
+    cost = front_cost / front_size
+    if extended_cost is not None:
+      cost = cost + self.extended_set_weight * extended_cost / len(self.extended_set)
+    return cost
 
   
 
@@ -12,18 +12,21 @@
 
 # This work is a modification of Qiskit's DAGCircuit class.
 
+import numpy as np
 import rustworkx as rx
-from collections import OrderedDict, defaultdict, deque, namedtuple
+from collections import Counter, OrderedDict, defaultdict, deque, namedtuple
 from typing import Dict, Generator, Any, List
 from qiskit.circuit.quantumregister import QuantumRegister, Qubit
 
 from qiskit.circuit.classicalregister import ClassicalRegister, Clbit
-from sabre_dag_experiments.bidag_op_node import DAGNode, DAGOpNode, DAGInNode, DAGOutNode
+from sabre_dag_experiments.bidag_op_node import DAGNode, DAGOpNode, DAGInNode, DAGOutNode, SHARED_OPS
+from sabre_dag_experiments.qubit_table import canonical_qubits
 from qiskit.circuit.bit import Bit
 
 
 BitLocations = namedtuple("BitLocations", ("index", "registers"))
 
+
 class BidirectionalDAGCircuit:
     
     def __init__(self):
@@ -80,8 +83,19 @@ class BidirectionalDAGCircuit:
         self._calibrations = defaultdict(dict)
         self.unit = "dt"
 
-        self.applied_nodes_left = []
-        self.applied_nodes_right = []
+        # Op nodes of each half in the order they were applied, i.e. starting
+        # next to the split. Deques so shift_split can move the head in O(1).
+        self.applied_nodes_left = deque()
+        self.applied_nodes_right = deque()
+
+        # Cached arrays of op-node in- and out-degrees, see op_in_degrees()
+        self._op_in_degrees = None
+        self._op_out_degrees = None
+
+        # Cached rx.layers decomposition and derived views, see multigraph_layers()
+        self._layers = None
+        self._front_layer = None
+        self._op_layers = None
 
     def num_qubits(self):
         """Return the total number of qubits used by the circuit.
@@ -166,6 +180,7 @@ class BidirectionalDAGCircuit:
             # print(type(left_v))
 
             self._multi_graph.merge_nodes(left_v._node_id, right_v._node_id)
+        self._invalidate_caches()
         
     def add_qubits(self, qubits):
         # print(qubits)
@@ -229,6 +244,7 @@ class BidirectionalDAGCircuit:
 
             outp_node_left.parents = [inp_node]
             outp_node_right.parents = [inp_node]
+            self._invalidate_caches()
         else:
             # raise KeyError(f"duplicate wire {wire}")
             print(f"KeyError(duplicate wire {wire})")
@@ -311,7 +327,7 @@ class BidirectionalDAGCircuit:
         # and adding new edges from the operation node to each output node
         
         ref_nodes_idx = [self.output_map_left[bit]._node_id for bits in (qargs, all_cbits) for bit in bits] if left else [self.output_map_right[bit]._node_id for bits in (qargs, all_cbits) for bit in bits]
-        ref_nodes = [self._multi_graph.nodes()[idx] for idx in ref_nodes_idx] # these are DAGOpNodes
+        ref_nodes = [self._multi_graph[idx] for idx in ref_nodes_idx] # these are DAGOpNodes
 
         new_node_parents = set()
 
@@ -323,6 +339,8 @@ class BidirectionalDAGCircuit:
             child.parents = [node]
     
         node.parents = list(new_node_parents)
+        self._link_op_parents(node)
+        self._invalidate_caches()
 
         self._multi_graph.insert_node_on_in_edges_multiple(
             node._node_id,
@@ -335,6 +353,173 @@ class BidirectionalDAGCircuit:
             self.applied_nodes_right.append(node)
         return node
     
+    @classmethod
+    def from_gate_list(cls, gates, n_qubits, index, lightweight=True):
+        """Build the BiDAG of ``gates`` split at ``index`` in bulk.
+
+        Equivalent to applying reversed(gates[:index]) on the left and gates[index:]
+        on the right with apply_operation_back, including node ids and the order
+        successors are returned in, but all op nodes and wire edges are added with
+        one add_nodes_from and one add_edges_from call.
+
+        Args:
+            gates (list[list[int]]): one- and two-qubit gates as lists of qubit indices
+            n_qubits (int): number of qubit wires
+            index (int): split point; gates before it form the left half
+            lightweight (bool): if ``True`` (default) every node shares the op
+                objects in SHARED_OPS instead of holding its own Instruction
+
+        Returns:
+            BidirectionalDAGCircuit: the new dag
+        """
+        dag = cls()
+        qubit_array = canonical_qubits(n_qubits)
+        dag.add_qubits(qubit_array)
+
+        nodes = []
+        node_gates = []
+        # gates on the same qubits share one qubit_indices tuple and one qargs tuple
+        qargs_cache = {}
+        for left, side_gates in ((True, reversed(gates[:index])), (False, gates[index:])):
+            for gate in side_gates:
+                if len(gate) not in SHARED_OPS:
+                    raise TypeError("Currently only support one and two-qubit gate.")
+                op = SHARED_OPS[len(gate)] if lightweight else SHARED_OPS[len(gate)].copy()
+                key = tuple(gate)
+                qargs = qargs_cache.get(key)
+                if qargs is None:
+                    qargs = qargs_cache[key] = (key, tuple(qubit_array[q] for q in gate))
+                nodes.append(DAGOpNode(op=op, left=left, qargs=qargs[1], dag=dag, qubit_indices=qargs[0]))
+                node_gates.append(key)
+        for node, node_id in zip(nodes, dag._multi_graph.add_nodes_from(nodes)):
+            node._node_id = node_id
+
+        # Replay the wiring of apply_operation_back. Edges are listed in the order
+        # they would have been created; an op -> output edge is dropped once a later
+        # op is appended to the same wire, so the survivors keep their relative order.
+        output_nodes = {True: [dag.output_map_left[wire] for wire in qubit_array],
+                        False: [dag.output_map_right[wire] for wire in qubit_array]}
+        output_edge = {True: [None] * n_qubits, False: [None] * n_qubits}
+        edges = []
+        for node, gate in zip(nodes, node_gates):
+            side_outputs = output_nodes[node.left]
+            side_edges = output_edge[node.left]
+            parents = []
+            for q in gate:
+                output_node = side_outputs[q]
+                parent = output_node.parents[0]
+                if parent not in parents:
+                    parents.append(parent)
+                if side_edges[q] is None:
+                    dag._multi_graph.remove_edge(parent._node_id, output_node._node_id)
+                else:
+                    edges[side_edges[q]] = None
+                edges.append((parent._node_id, node._node_id, qubit_array[q]))
+                side_edges[q] = len(edges)
+                edges.append((node._node_id, output_node._node_id, qubit_array[q]))
+                output_node.parents = [node]
+            node.parents = parents
+            dag._link_op_parents(node)
+        num_left = len(gates[:index])
+        dag.applied_nodes_left.extend(nodes[:num_left])
+        dag.applied_nodes_right.extend(nodes[num_left:])
+        for num_qubits, count in Counter(len(gate) for gate in node_gates).items():
+            name = SHARED_OPS[num_qubits].name
+            dag._op_names[name] = dag._op_names.get(name, 0) + count
+        dag._multi_graph.add_edges_from([edge for edge in edges if edge is not None])
+        return dag
+
+    def shift_split(self, step):
+        """Move the split point one gate to the right (``step=+1``) or left (``step=-1``).
+
+        For a dag built from ``gates`` split at ``index``, shift_split(+1) turns it
+        into the dag split at ``index + 1`` by moving gates[index], the head of the
+        right half, to the head of the left half; shift_split(-1) undoes that. Only
+        the moved gate's wire edges are relinked, so a shift costs O(number of
+        qubits of the gate). Node ids are kept, but the successor order of the
+        touched nodes may differ from a dag built from scratch at the new index.
+
+        Args:
+            step (int): +1 or -1
+
+        Returns:
+            DAGOpNode: the node that changed sides
+
+        Raises:
+            ValueError: if step is not +1/-1 or the half to take a gate from is empty
+        """
+        if step == 1:
+            source, target = self.applied_nodes_right, self.applied_nodes_left
+        elif step == -1:
+            source, target = self.applied_nodes_left, self.applied_nodes_right
+        else:
+            raise ValueError(f"shift_split step must be +1 or -1, not {step}")
+        if not source:
+            raise ValueError("no gate left to move across the split")
+
+        node = source.popleft()
+        to_left = step == 1
+        graph = self._multi_graph
+
+        # The head of a half sits directly after the input node on each of its
+        # wires. Unhook it from its old side (input -> node -> old_child becomes
+        # input -> old_child) and hook it in front of the other side
+        # (input -> new_child becomes input -> node -> new_child).
+        old_children = {}
+        new_children = {}
+        for wire in node.qargs:
+            inp_node = self.input_map[wire]
+            # Edges are removed by index: a two-qubit child is joined to node by two
+            # parallel edges and only the one on this wire may go. The input node
+            # has one out-edge per half, to node and to the head of the other side.
+            old_edge, old_child = next(
+                (edge, graph[dst]) for edge, (_, dst, edge_wire) in graph.incident_edge_index_map(node._node_id).items()
+                if edge_wire == wire
+            )
+            for edge, (_, dst, _) in graph.incident_edge_index_map(inp_node._node_id).items():
+                if dst == node._node_id:
+                    inp_edge = edge
+                else:
+                    new_edge, new_child = edge, graph[dst]
+            for edge in (inp_edge, old_edge, new_edge):
+                graph.remove_edge_from_index(edge)
+            graph.add_edge(inp_node._node_id, old_child._node_id, wire)
+            graph.add_edge(inp_node._node_id, node._node_id, wire)
+            graph.add_edge(node._node_id, new_child._node_id, wire)
+            old_children.setdefault(old_child, []).append(inp_node)
+            new_children.setdefault(new_child, []).append(inp_node)
+
+        for child, inp_nodes in old_children.items():
+            child.parents = [parent for parent in child.parents if parent is not node] + inp_nodes
+            if isinstance(child, DAGOpNode):
+                child.in_degree -= 1
+                node.out_degree -= 1
+        for child, inp_nodes in new_children.items():
+            child.parents = [parent for parent in child.parents if parent not in inp_nodes] + [node]
+            if isinstance(child, DAGOpNode):
+                child.in_degree += 1
+                node.out_degree += 1
+
+        node.left = to_left
+        target.appendleft(node)
+        self._invalidate_caches()
+        return node
+
+    def _link_op_parents(self, node):
+        """Set the degree counters for a new node whose parents are final."""
+        node.in_degree = 0
+        for parent in node.parents:
+            if isinstance(parent, DAGOpNode):
+                node.in_degree += 1
+                parent.out_degree += 1
+
+    def _invalidate_caches(self):
+        self._op_in_degrees = None
+        self._op_out_degrees = None
+        self._layers = None
+        self._front_layer = None
+        self._op_layers = None
+
     def _check_bits(self, args, amap):
         """Check the values of a list of (qu)bit arguments.
 
@@ -386,22 +571,129 @@ class BidirectionalDAGCircuit:
         return dag_drawer(dag=self, scale=scale, filename=filename, style=style)
 
     def front_layer(self):
-        """Return a list of op nodes in the first layer of this dag."""
-        graph_layers = self.multigraph_layers()
-        try:
-            next(graph_layers)  # Remove input nodes
-        except StopIteration:
-            return []
+        """Return a list of op nodes in the first layer of this dag.
 
-        op_nodes = [node for node in next(graph_layers) if isinstance(node, DAGOpNode)]
-
-        return op_nodes
+        The list is a fresh copy of a cached layer, so callers may consume it.
+        """
+        if self._front_layer is None:
+            graph_layers = self.multigraph_layers()
+            try:
+                next(graph_layers)  # Remove input nodes
+                self._front_layer = [node for node in next(graph_layers) if isinstance(node, DAGOpNode)]
+            except StopIteration:
+                self._front_layer = []
+        return list(self._front_layer)
 
     def multigraph_layers(self):
-        """Yield layers of the multigraph."""
-        first_layer = [x._node_id for x in self.input_map.values()]
-        return iter(rx.layers(self._multi_graph, first_layer))
+        """Yield layers of the multigraph.
+
+        The decomposition is computed once and cached until the dag is next mutated.
+        """
+        if self._layers is None:
+            first_layer = [x._node_id for x in self.input_map.values()]
+            self._layers = rx.layers(self._multi_graph, first_layer)
+        return iter(self._layers)
+
+    def op_layers(self):
+        """Return an int array mapping node id to the ASAP layer of that op node.
+
+        Layer 0 is the front layer; input and output nodes map to -1. Shares the
+        cached multigraph_layers pass.
+        """
+        if self._op_layers is None:
+            op_layers = np.full(max(self._multi_graph.node_indices(), default=-1) + 1, -1, dtype=np.int32)
+            # layer 0 of the multigraph holds the input nodes
+            for layer, nodes in enumerate(self.multigraph_layers()):
+                for node in nodes:
+                    if isinstance(node, DAGOpNode):
+                        op_layers[node._node_id] = layer - 1
+            self._op_layers = op_layers
+        return self._op_layers
+
+    def depth(self):
+        """Return the number of ASAP layers of op nodes."""
+        return int(self.op_layers().max(initial=-1)) + 1
     
+    def op_in_degrees(self):
+        """Return an int array mapping node id to the node's number of op-node parents.
+
+        Entries for input and output nodes are 0. The array is cached until the dag
+        is next mutated; callers that decrement it must take a copy.
+        """
+        if self._op_in_degrees is None:
+            self._op_in_degrees = self._degree_array("in_degree")
+        return self._op_in_degrees
+
+    def op_out_degrees(self):
+        """Like op_in_degrees, counting op-node children."""
+        if self._op_out_degrees is None:
+            self._op_out_degrees = self._degree_array("out_degree")
+        return self._op_out_degrees
+
+    def _degree_array(self, attr):
+        degrees = np.zeros(max(self._multi_graph.node_indices(), default=-1) + 1, dtype=np.int32)
+        for node in self._multi_graph.nodes():
+            if isinstance(node, DAGOpNode):
+                degrees[node._node_id] = getattr(node, attr)
+        return degrees
+
+    def reversed(self):
+        """Return a ReversedBiDAG view of this dag."""
+        return ReversedBiDAG(self)
+
     def successors(self, node):
         """Returns iterator of the successors of a node as DAGOpNodes and DAGOutNodes."""
-        return iter(self._multi_graph.successors(node._node_id))
\ No newline at end of file
+        return iter(self._multi_graph.successors(node._node_id))
+
+
+class ReversedBiDAG:
+    """Zero-copy view of a BidirectionalDAGCircuit with every edge flipped.
+
+    Both halves are traversed from their output nodes back towards the split:
+    the front layer is the op nodes without op-node children, a node's
+    successors are its parents and its in-degree is its number of op-node
+    children. This is the dag to_bidag() builds, without copying any node. It
+    offers the subset of the dag interface that BiDAGSabreSwap routes on; the
+    view reflects later changes to the dag.
+    """
+
+    def __init__(self, dag):
+        self.dag = dag
+
+    def num_qubits(self):
+        return self.dag.num_qubits()
+
+    @property
+    def qubits(self):
+        return self.dag.qubits
+
+    def front_layer(self):
+        """Return the op nodes in the first layer of the reversed dag."""
+        front = {}
+        for wire in self.dag.qubits:
+            for output_map in (self.dag.output_map_left, self.dag.output_map_right):
+                node = output_map[wire].parents[0]
+                if isinstance(node, DAGOpNode) and node.out_degree == 0:
+                    front[node] = None
+        return list(front)
+
+    def successors(self, node):
+        """Returns iterator of the successors of a node in the reversed dag."""
+        return iter(self.dag._multi_graph.predecessors(node._node_id))
+
+    def op_in_degrees(self):
+        return self.dag.op_out_degrees()
+
+    def reversed(self):
+        return self.dag
+
+    def to_bidag(self):
+        """Build the reversed dag as a new BidirectionalDAGCircuit."""
+        # from_gate_list applies gates[:index] reversed on the left and
+        # gates[index:] on the right
+        left = [list(node.qubit_indices) for node in self.dag.applied_nodes_left]
+        right = [list(node.qubit_indices) for node in reversed(self.dag.applied_nodes_right)]
+        return BidirectionalDAGCircuit.from_gate_list(left + right, self.num_qubits(), len(left))
+
+    def draw(self, scale=0.7, filename=None, style="color"):
+        return self.to_bidag().draw(scale=scale, filename=filename, style=style)
@@ -0,0 +1,113 @@
+import json
+import os
+
+# Records are flushed to the OS on every write, which survives a crash of the
+# sweep itself; fsync, which also survives the machine going down, is batched.
+FSYNC_EVERY = 32
+
+
+class SweepCheckpoint:
+  """Append-only JSONL stream of the per-index results of a split-index sweep.
+
+  The first line is a header holding ``key``, a dict identifying the sweep
+  (circuit, device, layout trials, ...), and every following line is one result
+  record. Opening an existing stream with the same key resumes it: its records
+  are loaded into ``completed`` and new records are appended after them. A stream
+  with a different key raises ValueError instead of mixing two sweeps, and a
+  partially written last line, left by a crash mid-write, is cut off.
+  """
+
+  def __init__(self, path, key, fsync_every=FSYNC_EVERY):
+    self.path = path
+    self.key = key
+    self.fsync_every = fsync_every
+    self.completed = {}
+    self._unsynced = 0
+
+    if os.path.exists(path):
+      self._load()
+      self._file = open(path, "a")
+    else:
+      self._file = open(path, "w")
+      self._write_line({"key": key})
+      self.sync()
+
+  def _load(self):
+    header = None
+    end = 0
+    with open(self.path, "rb") as file:
+      for line in file:
+        try:
+          entry = json.loads(line)
+        except ValueError:
+          break
+        if not line.endswith(b"\n"):
+          break
+        end += len(line)
+        if header is None:
+          header = entry
+        else:
+          self.completed[entry["index"]] = entry
+    if header is None:
+      raise ValueError(f"{self.path} is not a sweep checkpoint")
+    if header.get("key") != self.key:
+      raise ValueError(f"{self.path} holds the sweep {header.get('key')}, not {self.key}")
+    if end < os.path.getsize(self.path):
+      os.truncate(self.path, end)
+
+  def _write_line(self, entry):
+    self._file.write(json.dumps(entry, default=int) + "\n")
+    self._file.flush()
+
+  def write(self, record):
+    self._write_line(record)
+    self.completed[record["index"]] = record
+    self._unsynced += 1
+    if self._unsynced >= self.fsync_every:
+      self.sync()
+
+  def sync(self):
+    os.fsync(self._file.fileno())
+    self._unsynced = 0
+
+  def records(self):
+    """The completed records in index order."""
+    return [self.completed[index] for index in sorted(self.completed)]
+
+  def close(self):
+    if not self._file.closed:
+      self.sync()
+      self._file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+
+def summarize_sweep(records):
+  """The sweep summary fields, computed in one pass over ``records``.
+
+  Returns a dict with ``lowest_result`` and ``highest_result``, the records with
+  the lowest and highest swap count, and ``lowest_layout_swap_count_result``, the
+  record with the lowest layout swap count; ties go to the earliest record.
+  Pruned records carry no swap count and are skipped. Empty if nothing completed.
+  """
+  lowest = highest = lowest_layout = None
+  for record in records:
+    if record.get("pruned", False):
+      continue
+    if lowest is None or record["swap_count"] < lowest["swap_count"]:
+      lowest = record
+    if highest is None or record["swap_count"] > highest["swap_count"]:
+      highest = record
+    if lowest_layout is None or record["layout_swap_count"] < lowest_layout["layout_swap_count"]:
+      lowest_layout = record
+  if lowest is None:
+    return {}
+  return {
+    "lowest_result": lowest,
+    "highest_result": highest,
+    "lowest_layout_swap_count_result": lowest_layout,
+  }
@@ -0,0 +1,168 @@
+import itertools
+import numpy as np
+from sabre_dag_experiments.qubit_table import canonical_qubits
+
+_FIELDS = (
+  "qubits", "left", "succ_ptr", "succ_idx", "pred_ptr", "pred_idx",
+  "front", "output_left", "output_right",
+)
+
+
+class CompactBiDAG:
+  """Frozen, integer-array form of a BidirectionalDAGCircuit.
+
+  Op nodes are numbered 0..n_ops-1, left half then right half, each in the order
+  its ops were applied, which is a topological order. Per op:
+
+    qubits[k]     logical qubit pair, -1 in the second column for single-qubit gates
+    left[k]       True if the op belongs to the left (reversed) half
+
+  The successors of op ``k`` are ``succ_idx[succ_ptr[k]:succ_ptr[k + 1]]`` in the
+  order BidirectionalDAGCircuit.successors yields them, and its op-node parents
+  are ``pred_idx[pred_ptr[k]:pred_ptr[k + 1]]``. ``front`` is the initial front
+  layer and ``output_left[q]`` / ``output_right[q]`` the last op on wire ``q`` of
+  each half (-1 if that half of the wire is empty).
+
+  The arrays are read-only; a CompactBiDAG is never mutated after construction.
+  """
+
+  __slots__ = ("num_qubits",) + _FIELDS
+
+  def __init__(self, num_qubits, qubits, left, succ_ptr, succ_idx, pred_ptr, pred_idx, front, output_left, output_right):
+    arrays = {
+      "qubits": np.asarray(qubits, dtype=np.int32).reshape(-1, 2),
+      "left": np.asarray(left, dtype=bool),
+      "succ_ptr": np.asarray(succ_ptr, dtype=np.int64),
+      "succ_idx": np.asarray(succ_idx, dtype=np.int32),
+      "pred_ptr": np.asarray(pred_ptr, dtype=np.int64),
+      "pred_idx": np.asarray(pred_idx, dtype=np.int32),
+      "front": np.asarray(front, dtype=np.int32),
+      "output_left": np.asarray(output_left, dtype=np.int32),
+      "output_right": np.asarray(output_right, dtype=np.int32),
+    }
+    object.__setattr__(self, "num_qubits", int(num_qubits))
+    for name, array in arrays.items():
+      array.flags.writeable = False
+      object.__setattr__(self, name, array)
+
+  def __setattr__(self, name, value):
+    raise AttributeError("CompactBiDAG is immutable")
+
+  def __reduce__(self):
+    return (CompactBiDAG, (self.num_qubits,) + tuple(getattr(self, name) for name in _FIELDS))
+
+  @classmethod
+  def from_bidag(cls, bidag):
+    """Compile a BidirectionalDAGCircuit, or a ReversedBiDAG view of one.
+
+    A view compiles to the CompactBiDAG of the reversed dag without building it:
+    each half is numbered in reverse applied order, and successors and op-node
+    parents are read off the flipped edges. Ops keep their side.
+    """
+    from sabre_dag_experiments.bidirectional_dag_circuit import ReversedBiDAG
+
+    reverse = isinstance(bidag, ReversedBiDAG)
+    dag = bidag.dag if reverse else bidag
+    graph = dag._multi_graph
+    # each half in applied order is topological, and the halves are independent;
+    # in the reversed dag each half is topological in reverse applied order
+    halves = (dag.applied_nodes_left, dag.applied_nodes_right)
+    if reverse:
+      halves = tuple(reversed(half) for half in halves)
+    op_ids = [node._node_id for node in itertools.chain(*halves)]
+    position = {node_id: k for k, node_id in enumerate(op_ids)}
+    num_qubits = bidag.num_qubits()
+    successor_indices = graph.predecessor_indices if reverse else graph.successor_indices
+    parent_indices = graph.successor_indices if reverse else graph.predecessor_indices
+
+    qubits = np.full((len(op_ids), 2), -1, dtype=np.int32)
+    left = np.zeros(len(op_ids), dtype=bool)
+    succ_ptr = np.zeros(len(op_ids) + 1, dtype=np.int64)
+    pred_ptr = np.zeros(len(op_ids) + 1, dtype=np.int64)
+    succ_idx = []
+    pred_idx = []
+    # output_frontiers[side][q] ends up as the last op on wire q of that half
+    output_frontiers = {side: np.full(num_qubits, -1, dtype=np.int32) for side in (True, False)}
+    for k, node_id in enumerate(op_ids):
+      node = graph[node_id]
+      left[k] = node.left
+      qubits[k, :len(node.qubit_indices)] = node.qubit_indices
+      output_frontiers[node.left][list(node.qubit_indices)] = k
+      # successor_indices repeats a successor once per shared wire; keep the first
+      # occurrence so the order matches the dag's successors()
+      seen = set()
+      for s in successor_indices(node_id):
+        if s in position and s not in seen:
+          seen.add(s)
+          succ_idx.append(position[s])
+      succ_ptr[k + 1] = len(succ_idx)
+      pred_idx.extend(sorted({position[p] for p in parent_indices(node_id) if p in position}))
+      pred_ptr[k + 1] = len(pred_idx)
+
+    front = [position[node._node_id] for node in bidag.front_layer()]
+    return cls(
+      num_qubits, qubits, left, succ_ptr, succ_idx, pred_ptr, pred_idx, front,
+      output_frontiers[True], output_frontiers[False],
+    )
+
+  def to_bidag(self):
+    """Rebuild the equivalent BidirectionalDAGCircuit."""
+    from sabre_dag_experiments.dag_helpers import _add_gate_to_dagcircuit
+    from sabre_dag_experiments.bidirectional_dag_circuit import BidirectionalDAGCircuit
+
+    graph = BidirectionalDAGCircuit()
+    qubit_array = canonical_qubits(self.num_qubits)
+    graph.add_qubits(qubit_array)
+    for gate, left in zip(self.gate_list(), self.left.tolist()):
+      _add_gate_to_dagcircuit(gate, qubit_array, graph, left)
+    return graph
+
+  def num_ops(self):
+    return len(self.qubits)
+
+  def in_degrees(self):
+    """Number of op-node parents of each op."""
+    return np.diff(self.pred_ptr).astype(np.int32)
+
+  def gate_list(self):
+    """Ops as qubit lists, in the input format of construct_bidirectional_dagcircuit."""
+    return [[a] if b < 0 else [a, b] for a, b in self.qubits.tolist()]
+
+  def layer_indices(self):
+    """ASAP layer of each op: 0 for the front layer, 1 + max over parents otherwise."""
+    layer = [0] * self.num_ops()
+    pred_ptr = self.pred_ptr.tolist()
+    pred_idx = self.pred_idx.tolist()
+    for k in range(self.num_ops()):
+      for p in pred_idx[pred_ptr[k]:pred_ptr[k + 1]]:
+        if layer[p] >= layer[k]:
+          layer[k] = layer[p] + 1
+    return np.array(layer, dtype=np.int32)
+
+  def depth(self):
+    """Number of ASAP layers, i.e. the longest chain of dependent ops."""
+    if self.num_ops() == 0:
+      return 0
+    return int(self.layer_indices().max()) + 1
+
+  def nbytes(self):
+    return sum(getattr(self, name).nbytes for name in _FIELDS)
+
+  def save(self, path):
+    """Write the arrays to an .npz file."""
+    np.savez(path, num_qubits=self.num_qubits, **{name: getattr(self, name) for name in _FIELDS})
+
+  @classmethod
+  def load(cls, path):
+    with np.load(path) as data:
+      return cls(int(data["num_qubits"]), *(data[name] for name in _FIELDS))
+
+  def __eq__(self, other):
+    return (
+      isinstance(other, CompactBiDAG)
+      and self.num_qubits == other.num_qubits
+      and all(np.array_equal(getattr(self, name), getattr(other, name)) for name in _FIELDS)
+    )
+
+  def __repr__(self):
+    return f"CompactBiDAG(num_qubits={self.num_qubits}, num_ops={self.num_ops()})"
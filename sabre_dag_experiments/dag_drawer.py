@@ -0,0 +1,90 @@
+# This code is part of Qiskit.
+#
+# (C) Copyright IBM 2017, 2018, 2020.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+#
+# Modified to draw BidirectionalDAGCircuits, whose nodes are the classes of
+# sabre_dag_experiments.bidag_op_node and whose wires end in a left and a right
+# output node.
+
+"""Graphviz drawing of a BidirectionalDAGCircuit."""
+
+from rustworkx.visualization import graphviz_draw
+
+from qiskit.exceptions import InvalidFileError
+from qiskit.visualization.exceptions import VisualizationError
+from sabre_dag_experiments.bidag_op_node import DAGOpNode, DAGInNode, DAGOutNode
+
+
+def dag_drawer(dag, scale=0.7, filename=None, style="color"):
+    """Plot a BidirectionalDAGCircuit using graphviz.
+
+    In the 'color' style, op nodes of the left (reversed) half are orange and those
+    of the right half light blue, input nodes are green and output nodes red, each
+    labelled with its wire and side.
+
+    Args:
+        dag (BidirectionalDAGCircuit): The dag to draw.
+        scale (float): scaling factor
+        filename (str): file path to save image to (format inferred from name)
+        style (str): 'plain': B&W graph
+                     'color' (default): color input/output/op nodes
+
+    Returns:
+        PIL.Image: if in Jupyter notebook and not saving to file,
+            otherwise None.
+
+    Raises:
+        VisualizationError: when style is not recognized.
+        InvalidFileError: when filename provided is not valid
+    """
+    if style not in ("plain", "color"):
+        raise VisualizationError("Invalid style %s" % style)
+
+    graph_attrs = {"dpi": str(100 * scale)}
+
+    def wire_label(wire):
+        return f"q_{dag.find_bit(wire).index}"
+
+    def node_attr_func(node):
+        if style == "plain":
+            return {}
+        n = {"style": "filled"}
+        if isinstance(node, DAGOpNode):
+            n["label"] = node.name
+            n["color"] = "blue"
+            n["fillcolor"] = "orange" if node.left else "lightblue"
+        elif isinstance(node, DAGInNode):
+            n["label"] = wire_label(node.wire)
+            n["color"] = "black"
+            n["fillcolor"] = "green"
+        elif isinstance(node, DAGOutNode):
+            side = "left" if node.left else "right"
+            n["label"] = f"{wire_label(node.wire)} ({side})"
+            n["color"] = "black"
+            n["fillcolor"] = "red"
+        return n
+
+    def edge_attr_func(edge):
+        return {"label": wire_label(edge)}
+
+    image_type = None
+    if filename:
+        if "." not in filename:
+            raise InvalidFileError("Parameter 'filename' must be in format 'name.extension'")
+        image_type = filename.split(".")[-1]
+    return graphviz_draw(
+        dag._multi_graph,
+        node_attr_func,
+        edge_attr_func,
+        graph_attrs,
+        filename,
+        image_type,
+    )
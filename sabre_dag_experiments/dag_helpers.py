@@ -4,6 +4,9 @@ from qiskit.transpiler.passes import SabreLayout
 from qiskit.converters import *
 from qiskit.dagcircuit import DAGCircuit
 from sabre_dag_experiments.bidirectional_dag_circuit import BidirectionalDAGCircuit
+from sabre_dag_experiments.qubit_table import canonical_register
+from sabre_dag_experiments.bidag_op_node import SHARED_OPS
+from sabre_dag_experiments.device_context import device_context
 from qiskit.circuit import Qubit, QuantumRegister, CircuitInstruction, Instruction
 import copy
 
@@ -54,16 +57,12 @@ def circuit_to_dag(circuit, copy_operations=True, *, qubit_order=None, clbit_ord
 
 # Adds a gate to LEFT or Right dagcircuit. Additional parameter 'left'
 def _add_gate_to_dagcircuit(gate, qubit_array, bidirectional_dagcircuit, left):
-    if len(gate) == 1:
-        instruction = CircuitInstruction(operation=Instruction(name='h', num_qubits=1, num_clbits=0, params=[]), qubits=[qubit_array[gate[0]]])
-        bidirectional_dagcircuit.apply_operation_back(instruction.operation, instruction.qubits, instruction.clbits, left)
-        
-    elif len(gate) == 2:
-        instruction = CircuitInstruction(operation=Instruction(name='cx', num_qubits=2, num_clbits=0, params=[]), qubits=(qubit_array[gate[0]], qubit_array[gate[1]]))
-        bidirectional_dagcircuit.apply_operation_back(instruction.operation, instruction.qubits, instruction.clbits, left)
+    # h and cx nodes share the SHARED_OPS instances, see from_gate_list
+    if len(gate) in SHARED_OPS:
+        bidirectional_dagcircuit.apply_operation_back(SHARED_OPS[len(gate)], [qubit_array[q] for q in gate], (), left)
 
 def construct_qc(list_gate, count_physical_qubit): # list_gate is a tuple of lists
-    qc = QuantumCircuit(count_physical_qubit)
+    qc = QuantumCircuit(canonical_register(count_physical_qubit))
     for gate in list_gate:
         if len(gate) == 2:
             qc.cx(gate[0], gate[1])
@@ -73,49 +72,12 @@ def construct_qc(list_gate, count_physical_qubit): # list_gate is a tuple of lis
             raise TypeError("Currently only support one and two-qubit gate.")
     return qc
 
-def construct_reverse_bidirectional_dagcircuit(dag, count_physical_qubit, index):
-    graph = BidirectionalDAGCircuit()
-    qubit_array = [Qubit(register=QuantumRegister(size=count_physical_qubit, name='q'), index=i) for i in range(count_physical_qubit)]
-    graph.add_qubits(qubit_array)
-
-    print("reverse applied nodes left")
-    print(reversed(dag.applied_nodes_left))
-
-    print("reverse applied nodes right")
-    print(reversed(dag.applied_nodes_right))
-
-    for gate in reversed(dag.applied_nodes_left):
-        gate_tuple = tuple([qubit.index for qubit in gate.qargs])
-        _add_gate_to_dagcircuit(gate_tuple, qubit_array, graph, True)
-
-    for gate in reversed(dag.applied_nodes_right):
-        gate_tuple = tuple([qubit.index for qubit in gate.qargs])
-        _add_gate_to_dagcircuit(gate_tuple, qubit_array, graph, False)
-    
-    # For Visualization
-    # bidag = graph.draw(scale=0.7, style='color')
-    # bidag.save(f'reverse_bidirectional_dagcircuit_index_{index}.png')
-    
-    return graph
-    
-
-def construct_bidirectional_dagcircuit(circuit_info, count_physical_qubit, index):
-    left_circuit_info = reversed(circuit_info[:index])
-    right_circuit_info = circuit_info[index:]
-
-    graph = BidirectionalDAGCircuit()
-    qubit_array = [Qubit(register=QuantumRegister(size=count_physical_qubit, name='q'), index=i) for i in range(count_physical_qubit)]
-    graph.add_qubits(qubit_array)
-
-    for gate in left_circuit_info:
-        _add_gate_to_dagcircuit(gate, qubit_array, graph, True)
-    for gate in right_circuit_info:
-        _add_gate_to_dagcircuit(gate, qubit_array, graph, False)
-    
-    return graph
+def construct_bidirectional_dagcircuit(circuit_info, count_physical_qubit, index, lightweight=True):
+    # gates before index go on the left (reversed), the rest on the right
+    return BidirectionalDAGCircuit.from_gate_list(circuit_info, count_physical_qubit, index, lightweight=lightweight)
 
 def run_sabre_on_dag(dagcircuit, coupling, layout_trials):
-    device = CouplingMap(couplinglist = coupling, description="sabre_test")
+    device = device_context(coupling).coupling_map
     # sbs = SabreSwap(coupling_map = device, heuristic = "lookahead", seed = 0, trials=1)
     sbl = SabreLayout(coupling_map = device, seed = 0, layout_trials=layout_trials, skip_routing=True)
     
@@ -0,0 +1,83 @@
+import numpy as np
+import rustworkx
+from qiskit.transpiler import CouplingMap
+from qiskit._accelerate.sabre_swap import NeighborTable
+from sabre_dag_experiments.device import qcdevice
+
+
+class DeviceContext:
+  """The routing structures of one device, built once and shared read-only.
+
+  Routing only looks at which physical qubits are coupled, never at the
+  direction of a coupling, so a context is built from the undirected edge set:
+
+    coupling_map     symmetric CouplingMap over ``num_physical`` qubits
+    dist_matrix      its all-pairs distance matrix (read-only)
+    neighbor_table   Qiskit NeighborTable for the Rust SABRE passes
+    coupled          (n, n) bool array, coupled[Q_m, Q_n] iff Q_m and Q_n share an edge
+    neighbors        neighbors[Q] lists the physical neighbours of Q in ascending order
+    zobrist          zobrist[v][Q], the key hashing virtual qubit v placed on physical Q
+
+  Use device_context() rather than the constructor so every router and evaluator
+  in the process shares one context per device. Nothing may mutate a context or
+  its coupling map.
+  """
+
+  def __init__(self, num_physical, edges):
+    self.num_physical = num_physical
+    self.edges = edges
+
+    coupling_map = CouplingMap(description="sabre_test")
+    for q in range(num_physical):
+      coupling_map.add_physical_qubit(q)
+    for u, v in edges:
+      coupling_map.add_edge(u, v)
+      coupling_map.add_edge(v, u)
+    self.coupling_map = coupling_map
+
+    self.dist_matrix = coupling_map.distance_matrix
+    self.dist_matrix.flags.writeable = False
+    self.neighbor_table = NeighborTable(rustworkx.adjacency_matrix(coupling_map.graph))
+
+    coupled = np.zeros((num_physical, num_physical), dtype=bool)
+    for u, v in edges:
+      coupled[u, v] = coupled[v, u] = True
+    coupled.flags.writeable = False
+    self.coupled = coupled
+    self.neighbors = tuple(tuple(np.flatnonzero(row).tolist()) for row in coupled)
+    self.zobrist = zobrist_table(num_physical)
+
+  def __repr__(self):
+    return f"DeviceContext(num_physical={self.num_physical}, num_edges={len(self.edges)})"
+
+
+def zobrist_table(num_physical):
+  """Zobrist keys for hashing layouts incrementally, one per (virtual, physical) pair."""
+  keys = np.random.default_rng(0).integers(0, 2**63, size=(num_physical, num_physical))
+  return tuple(tuple(row) for row in keys.tolist())
+
+
+_contexts = {}
+
+
+def device_context(device):
+  """The process-wide DeviceContext of ``device``.
+
+  ``device`` is a qcdevice, a CouplingMap or a list of (u, v) edges. Contexts are
+  keyed by qubit count and undirected edge set, so every description of the same
+  device, in any edge order or direction, gets the same context.
+  """
+  if isinstance(device, qcdevice):
+    num_physical, edge_list = device.count_physical_qubit, device.list_qubit_edge
+  elif isinstance(device, CouplingMap):
+    num_physical, edge_list = device.size(), device.get_edges()
+  else:
+    edge_list = device
+    num_physical = max((max(edge) for edge in edge_list), default=-1) + 1
+
+  edges = tuple(sorted({(min(u, v), max(u, v)) for u, v in edge_list if u != v}))
+  key = (num_physical, edges)
+  context = _contexts.get(key)
+  if context is None:
+    context = _contexts[key] = DeviceContext(num_physical, edges)
+  return context
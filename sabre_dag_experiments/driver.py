@@ -2,17 +2,46 @@ from sabre_dag_experiments.device import qcdevice
 from sabre_dag_experiments.input import input_qasm
 from qiskit.converters import circuit_to_dag, dag_to_circuit
 from sabre_dag_experiments.qc_helpers import run_sabre, apply_layout_and_generate_sabre_swaps, construct_qc
-from sabre_dag_experiments.dag_helpers import run_sabre_on_dag, construct_bidirectional_dagcircuit, construct_reverse_bidirectional_dagcircuit
+from sabre_dag_experiments.dag_helpers import run_sabre_on_dag, construct_bidirectional_dagcircuit
 from qiskit.transpiler import PassManager, CouplingMap
 from qiskit.transpiler.passes import SabreLayout, SabreSwap
 from qiskit.circuit import Qubit, QuantumRegister
 from sabre_dag_experiments.bidag_sabre_swap import BiDAGSabreSwap
+from sabre_dag_experiments.qubit_table import to_qubit_mapping
+from sabre_dag_experiments.device_context import device_context
+from sabre_dag_experiments.artifacts import NULL_ARTIFACTS, bidag_artifact, circuit_artifact, circuit_dag_artifact, coupling_map_artifact
 from qiskit.transpiler.layout import Layout
 
 from qiskit._accelerate.nlayout import NLayout
+from concurrent.futures import ProcessPoolExecutor
+import bisect
+import contextlib
+import itertools
+import multiprocessing
+import os
+import numpy as np
+
+# The all-indices sweep works in chunks of this many consecutive split indices,
+# each built once and then slid with shift_split.
+SWEEP_CHUNK_SIZE = 32
+
+# The coarse-to-fine index search refines around this many of its best indices.
+SEARCH_REFINE_TOP = 3
+
+# Sweep workers receive the driver, with its program and device, once through the
+# pool initializer instead of with every task. They are spawned, not forked: a fork
+# after qiskit's Rust passes have started their thread pool can deadlock the child.
+_worker_driver = None
+
+def _init_sweep_worker(driver):
+    global _worker_driver
+    _worker_driver = driver
+
+def _run_sweep_group(chunk_start, indices):
+    return _worker_driver._evaluate_index_group(chunk_start, indices)
 
 class Driver:
-    def __init__(self, layout_trials):
+    def __init__(self, layout_trials, workers=1):
         # These values should be updated in setdevice(...)
         self.device = None
         self.count_physical_qubit = 0
@@ -36,6 +65,18 @@ class Driver:
         # self.ancillary_var_counter = 0
 
         self.layout_trials = layout_trials
+        # processes for the split-index sweep; None uses every core
+        self.workers = workers
+        # incumbent swap count for branch-and-bound pruning of the sweep, see set_swap_upper_bound
+        self.swap_upper_bound = None
+        # images requested by the run go to this ArtifactSink, see set_artifact_sink
+        self.artifacts = NULL_ARTIFACTS
+
+    def __getstate__(self):
+        # sweep workers are sent the driver; the artifact sink stays in this process
+        state = self.__dict__.copy()
+        state["artifacts"] = NULL_ARTIFACTS
+        return state
  
     def set_circuit_name(self, name):
         self.circuit_name = name
@@ -43,6 +84,14 @@ class Driver:
     def set_device_name(self, name):
         self.device_name = name
 
+    def set_artifact_sink(self, artifacts):
+        """Send the images of this run to ``artifacts`` instead of dropping them."""
+        self.artifacts = artifacts
+
+    def set_swap_upper_bound(self, bound):
+        """Prune sweep indices that cannot beat ``bound`` swaps; None disables pruning."""
+        self.swap_upper_bound = bound
+
     def setdevice(self, device: qcdevice):
         """Pass in parameters from the given device.  If in TB mode,
            swap_duration is set to 1 without modifying the device.
@@ -135,54 +184,44 @@ class Driver:
                 self.list_gate_two.append(l)
         
     def get_swap_upper_bound(self, heuristic="basic"):
-        swap_num, depth, layout = run_sabre(self.list_gate_qubits, self.list_qubit_edge, self.count_physical_qubit, heuristic, self.layout_trials)
+        swap_num, depth, layout = run_sabre(self.list_gate_qubits, self.list_qubit_edge, self.count_physical_qubit, heuristic, self.layout_trials, self.artifacts)
         # print("Run heuristic compiler sabre to get upper bound for SWAP: {}, depth: {}".format(swap_num, depth))
         return swap_num, depth, layout
     
     def build_bidirectional_initial_mapping(self, index, initial_layout=None):
 
-        # print("Drawing original circuit in orig_circuit.png")
         qc = construct_qc(self.list_gate_qubits, self.count_physical_qubit)
-        qc.draw(scale=0.7, filename = "orig_circuit.png", output='mpl', style='color')
-        device = CouplingMap(couplinglist = self.list_qubit_edge, description="sabre_test")
-
-        # print("Drawing Coupling Map...")
-        device = CouplingMap(couplinglist = self.list_qubit_edge, description="sabre_test")
-        img = device.draw()
-        img.save("coupling_map.png")
+        device = device_context(self.list_qubit_edge).coupling_map
 
         bidirectional_dag = construct_bidirectional_dagcircuit(self.list_gate_qubits, self.count_physical_qubit, index)
-        reverse_bidirectional_dag = construct_reverse_bidirectional_dagcircuit(bidirectional_dag, self.count_physical_qubit, index)
+        reverse_bidirectional_dag = bidirectional_dag.reversed()
 
         # For Visualization
-        bidag_img = bidirectional_dag.draw(scale=0.7, style='color')
-        bidag_img.save(f'bidirectional_dagcircuit_index_{index}.png')
-
-        reverse_bidag_img = reverse_bidirectional_dag.draw(scale=0.7, style='color')
-        reverse_bidag_img.save(f'reverse_bidirectional_dagcircuit_index_{index}.png')
+        if self.artifacts.enabled:
+            self.artifacts.add(circuit_artifact("orig_circuit.png", qc, scale=0.7, output='mpl', style='color'))
+            self.artifacts.add(coupling_map_artifact("coupling_map.png", self.list_qubit_edge))
+            self.artifacts.add(bidag_artifact(f'bidirectional_dagcircuit_index_{index}.png', bidirectional_dag, scale=0.7, style='color'))
+            self.artifacts.add(bidag_artifact(f'reverse_bidirectional_dagcircuit_index_{index}.png', reverse_bidirectional_dag, scale=0.7, style='color'))
+
+            #########################
+
+            # case study of SabreSwap and BiDAGSabreSwap, run only for its images
+            sabre_swap = SabreSwap(coupling_map = device, heuristic = 'basic', seed = 0, trials = 1)
+            pm = PassManager(sabre_swap)
+            self.artifacts.add(circuit_dag_artifact('case_study_sabre_swap_input_dag.png', qc, scale = 0.7))
+            self.artifacts.add(bidag_artifact('case_study_bidag_sabre_swap_input_bidag.png', bidirectional_dag, scale=0.7, style='color'))
+            out_cir = pm.run(qc)
+            self.artifacts.add(circuit_artifact('case_study_sabre_swap_out_cir.png', out_cir, scale = 0.7, output='mpl', style='color'))
+            self.artifacts.add(circuit_dag_artifact('case_study_sabre_swap_out_dag.png', out_cir, scale = 0.7))
 
-        #########################
-
-        print("TESTING SabreSwap with 1 trial")
-        sabre_swap = SabreSwap(coupling_map = device, heuristic = 'basic', seed = 0, trials = 1)
-        pm = PassManager(sabre_swap)
-        input_dag = circuit_to_dag(qc)
-        input_dag.draw(scale = 0.7, filename = 'case_study_sabre_swap_input_dag.png')
-        bidag_img.save('case_study_bidag_sabre_swap_input_bidag.png')
-        out_cir = pm.run(qc)
-        out_cir.draw(scale = 0.7, filename = 'case_study_sabre_swap_out_cir.png', output='mpl', style='color')
-        out_dag = circuit_to_dag(out_cir)
-        out_dag.draw(scale = 0.7, filename = 'case_study_sabre_swap_out_dag.png')
+            initial_mapping =  {
+                k: k for k in range(self.count_physical_qubit)
+            }
 
-        initial_mapping =  {
-            k: k for k in range(self.count_physical_qubit)
-        }
-        
-        bidag_sabre_swap = BiDAGSabreSwap(bidag=bidirectional_dag, coupling_map=device, initial_mapping=initial_mapping, heuristic='basic', seed = 0, trials = 1)
-        swaps, final_mapping, final_qc = bidag_sabre_swap.run()
-        final_qc.draw(scale = 0.7, filename = 'case_study_bidag_sabre_swap_out_cir.png', output='mpl', style='color')
-        final_dag = circuit_to_dag(final_qc)
-        final_dag.draw(scale = 0.7, filename = 'case_study_bidag_sabre_swap_out_dag.png')
+            bidag_sabre_swap = BiDAGSabreSwap(bidag=bidirectional_dag, coupling_map=device, initial_mapping=initial_mapping, heuristic='basic', seed = 0, trials = 1)
+            swaps, final_mapping, final_qc = bidag_sabre_swap.run()
+            self.artifacts.add(circuit_artifact('case_study_bidag_sabre_swap_out_cir.png', final_qc, scale = 0.7, output='mpl', style='color'))
+            self.artifacts.add(circuit_dag_artifact('case_study_bidag_sabre_swap_out_dag.png', final_qc, scale = 0.7))
 
 
         ##################################
@@ -206,9 +245,10 @@ class Driver:
                 else:
                     dag = reverse_bidirectional_dag
                 sbs = BiDAGSabreSwap(bidag=dag, coupling_map=device, initial_mapping=initial_mapping, heuristic="basic", seed=0, trials=None)
-                swaps, final_mapping, final_qc = sbs.run()
+                # layout iterations only need the swap count and final mapping
+                routing = sbs.route()
 
-                initial_mapping = final_mapping
+                initial_mapping = routing.final_mapping()
 
         # for _ in range(self.layout_trials):
         #     dag = bidirectional_dag
@@ -217,14 +257,14 @@ class Driver:
 
         #     initial_mapping = final_mapping
         
-        final_swap_count = len(swaps)
+        final_swap_count = len(routing)
     
         print(f"SabreLayout with {self.layout_trials} layout trials found this initial mapping and swap count:")
         print(initial_mapping)
         print(final_swap_count)
 
         # convert initial_mapping from int->int dict to int->Qubit dict
-        initial_mapping = {k: Qubit(register=QuantumRegister(size=self.count_physical_qubit, name='q'), index=v) for k, v in initial_mapping.items()}
+        initial_mapping = to_qubit_mapping(initial_mapping, self.count_physical_qubit)
 
         # FORCE FEED INITIAL MAPPING
         # original mapping found by BiDAGSabreSwap: {0: 9, 1: 4, 2: 0, 3: 11, 4: 6, 5: 13, 6: 3, 7: 15, 8: 5, 9: 8, 10: 14, 11: 2, 12: 12, 13: 10, 14: 1, 15: 7}
@@ -233,74 +273,198 @@ class Driver:
         # initial_mapping = {k: Qubit(register=QuantumRegister(size=self.count_physical_qubit, name='q'), index=v) for k, v in initial_mapping.items()}
 
         
-        left_swap_count, left_depth = apply_layout_and_generate_sabre_swaps(self.list_gate_qubits, self.list_qubit_edge, self.count_physical_qubit, initial_mapping, True, index, self.layout_trials, visualize=True)
-        right_swap_count, right_depth = apply_layout_and_generate_sabre_swaps(self.list_gate_qubits, self.list_qubit_edge, self.count_physical_qubit, initial_mapping, False, index, self.layout_trials,  visualize=True)
+        left_swap_count, left_depth = apply_layout_and_generate_sabre_swaps(self.list_gate_qubits, self.list_qubit_edge, self.count_physical_qubit, initial_mapping, True, index, self.layout_trials, self.artifacts)
+        right_swap_count, right_depth = apply_layout_and_generate_sabre_swaps(self.list_gate_qubits, self.list_qubit_edge, self.count_physical_qubit, initial_mapping, False, index, self.layout_trials, self.artifacts)
 
         result = ({'index': index, 'layout_swap_count': final_swap_count, 'swap_count': left_swap_count + right_swap_count, 'depth': left_depth + right_depth})
         return result
 
 
-    def build_bidirectional_initial_mappings_for_all_indices(self):
-        qc = construct_qc(self.list_gate_qubits, self.count_physical_qubit)
-        qc.draw(scale=0.7, filename = "orig_circuit.png", output='mpl', style='color')
-        device = CouplingMap(couplinglist = self.list_qubit_edge, description="sabre_test")
-
-        # print("Drawing Coupling Map...")
-        device = CouplingMap(couplinglist = self.list_qubit_edge, description="sabre_test")
-        img = device.draw()
-        img.save("coupling_map.png")
+    def build_bidirectional_initial_mappings_for_all_indices(self, checkpoint=None):
+        self._add_sweep_artifacts()
+        return self.evaluate_indices(range(len(self.list_gate_qubits)), checkpoint)
+
+    def _add_sweep_artifacts(self):
+        # the sweeps route without artifacts; only the program and device are drawn
+        if self.artifacts.enabled:
+            qc = construct_qc(self.list_gate_qubits, self.count_physical_qubit)
+            self.artifacts.add(circuit_artifact("orig_circuit.png", qc, scale=0.7, output='mpl', style='color'))
+            self.artifacts.add(coupling_map_artifact("coupling_map.png", self.list_qubit_edge))
+
+    def _sweep_pool(self, workers):
+        # a spawned process pool that receives the driver once, or None for a single worker
+        if workers <= 1:
+            return contextlib.nullcontext()
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_sweep_worker, initargs=(self,))
+
+    def evaluate_indices(self, indices, checkpoint=None, executor=None):
+        """Evaluate the given split indices and return their result dicts in index order.
+
+        Indices are grouped into chunks of SWEEP_CHUNK_SIZE consecutive indices. A
+        chunk builds its dag once, at the chunk start, and walks it forward with
+        shift_split, so the dag an index is routed on does not depend on which other
+        indices are evaluated or on the number of workers. With more than one worker
+        the chunks are spread over a process pool that receives the driver once.
+
+        With a SweepCheckpoint, indices it already completed are taken from it
+        instead of being evaluated, and every new result is written to it as soon
+        as its chunk finishes. A pool from _sweep_pool() may be passed as
+        ``executor`` to reuse it across calls.
+        """
+        indices = sorted(set(indices))
+        completed = checkpoint.completed if checkpoint is not None else {}
+        results = {index: completed[index] for index in indices if index in completed}
+        pending = [index for index in indices if index not in results]
+
+        def collect(group_results):
+            for result in group_results:
+                results[result['index']] = result
+                if checkpoint is not None:
+                    checkpoint.write(result)
+
+        groups = [list(group) for _, group in itertools.groupby(pending, key=lambda i: i // SWEEP_CHUNK_SIZE)]
+        chunk_starts = [group[0] // SWEEP_CHUNK_SIZE * SWEEP_CHUNK_SIZE for group in groups]
+        workers = min(self.workers or os.cpu_count() or 1, len(groups))
+        if executor is not None and len(groups) > 1:
+            for group_results in executor.map(_run_sweep_group, chunk_starts, groups):
+                collect(group_results)
+        elif workers <= 1:
+            for chunk_start, group in zip(chunk_starts, groups):
+                collect(self._evaluate_index_group(chunk_start, group))
+        else:
+            with self._sweep_pool(workers) as executor:
+                for group_results in executor.map(_run_sweep_group, chunk_starts, groups):
+                    collect(group_results)
+        return [results[index] for index in indices]
+
+    def search_indices(self, budget, refine_top=SEARCH_REFINE_TOP, checkpoint=None):
+        """Coarse-to-fine search for the split index with the lowest swap count.
+
+        About half of ``budget`` goes to an evenly spaced grid over all split indices.
+        The rest is spent in rounds of interval halving: each round evaluates the
+        midpoints between each of the ``refine_top`` best indices found so far and its
+        evaluated neighbours, skipping indices whose neighbours are already adjacent,
+        until ``budget`` indices have been evaluated or no interval is left to split.
+        Returns the result dicts of the evaluated indices in index order. All rounds
+        share one worker pool.
+        """
+        count = len(self.list_gate_qubits)
+        budget = min(budget, count)
+        if budget <= 0:
+            return []
+        self._add_sweep_artifacts()
+        with self._sweep_pool(self.workers or os.cpu_count() or 1) as executor:
+            return self._search_indices(count, budget, refine_top, checkpoint, executor)
+
+    def _search_indices(self, count, budget, refine_top, checkpoint, executor):
+        grid_size = max(1, (budget + 1) // 2)
+        grid = np.unique(np.round(np.linspace(0, count - 1, num=grid_size)).astype(int)).tolist()
+        evaluated = {result['index']: result for result in self.evaluate_indices(grid, checkpoint, executor)}
+
+        while len(evaluated) < budget:
+            ordered = sorted(evaluated)
+            ranked = sorted(evaluated.values(), key=lambda result: (result.get('pruned', False), result['swap_count'] or 0, result['index']))
+            candidates = []
+            refined = 0
+            for result in ranked:
+                if refined == refine_top:
+                    break
+                position = bisect.bisect_left(ordered, result['index'])
+                neighbours = ordered[max(position - 1, 0):position + 2]
+                midpoints = [(low + high) // 2 for low, high in zip(neighbours, neighbours[1:]) if high - low > 1]
+                midpoints = [index for index in midpoints if index not in candidates]
+                if midpoints:
+                    candidates.extend(midpoints)
+                    refined += 1
+            if not candidates:
+                break
+            candidates = candidates[:budget - len(evaluated)]
+            evaluated.update((result['index'], result) for result in self.evaluate_indices(candidates, checkpoint, executor))
+
+        return [evaluated[index] for index in sorted(evaluated)]
+
+    def _evaluate_index_group(self, chunk_start, indices):
+        # indices are ascending and none is below chunk_start
+        device = device_context(self.list_qubit_edge).coupling_map
+        bidirectional_dag = construct_bidirectional_dagcircuit(self.list_gate_qubits, self.count_physical_qubit, chunk_start)
+        # a view onto bidirectional_dag, so it follows the split as well
+        reverse_bidirectional_dag = bidirectional_dag.reversed()
+        split = chunk_start
+        # every chunk starts from the driver's bound, keeping pruning independent of the worker count
+        incumbent = self.swap_upper_bound
 
         results = []
-        for index in range(len(self.list_gate_qubits)):
-            bidirectional_dag = construct_bidirectional_dagcircuit(self.list_gate_qubits, self.count_physical_qubit, index)
-            reverse_bidirectional_dag = construct_reverse_bidirectional_dagcircuit(bidirectional_dag, self.count_physical_qubit, index)
-            # Idea 1: Replace with random mapping
-            # Idea 2: For index 0, feed from original SABRE
+        for index in indices:
+            while split < index:
+                bidirectional_dag.shift_split(+1)
+                split += 1
+            result = self.evaluate_index(index, bidirectional_dag, reverse_bidirectional_dag, device, incumbent)
+            if incumbent is not None and not result.get('pruned', False):
+                incumbent = min(incumbent, result['swap_count'])
+            results.append(result)
+        return results
 
-            initial_mapping =  {
-                k: k for k in range(self.count_physical_qubit)
-            }
+    def evaluate_index(self, index, bidirectional_dag, reverse_bidirectional_dag, device, incumbent=None):
+        """Find a layout for the dag split at ``index`` and evaluate it with Qiskit's SabreLayout.
 
-            best_mapping = None
-            lowest_layout_swap_count = float("inf")
-            for _ in range(self.layout_trials):
-                for dir in ["forward", "reverse"]:
-                    if dir == 'forward':
-                        dag = bidirectional_dag
-                    else:
-                        dag = reverse_bidirectional_dag
-                    sbs = BiDAGSabreSwap(bidag=dag, coupling_map=device, initial_mapping=initial_mapping, heuristic="basic", seed=0, trials=None)
-                    swaps, final_mapping = sbs.run()
-
-                    if len(swaps) < lowest_layout_swap_count:
-                        best_mapping = final_mapping
-                        lowest_layout_swap_count = len(swaps)
-
-                    initial_mapping = final_mapping
-
-            # for _ in range(self.layout_trials):
-            #     dag = bidirectional_dag
-        
-            #     sbs = BiDAGSabreSwap(bidag=dag, coupling_map=device, initial_mapping=initial_mapping, heuristic="basic", seed=0, trials=None)
-            #     swaps, final_mapping = sbs.run()
+        With an ``incumbent`` swap count the index is abandoned, and returned with
+        ``pruned`` set and no swap count or depth, once its running left plus right
+        swap count reaches the incumbent. The layout passes are never cut short:
+        their swap counts are no bound on the routed halves, and each pass starts
+        from the mapping the previous one finished with.
+        """
+        # Idea 1: Replace with random mapping
+        # Idea 2: For index 0, feed from original SABRE
+
+        initial_mapping =  {
+            k: k for k in range(self.count_physical_qubit)
+        }
+
+        best_mapping = None
+        lowest_layout_swap_count = float("inf")
+        for _ in range(self.layout_trials):
+            for dir in ["forward", "reverse"]:
+                if dir == 'forward':
+                    dag = bidirectional_dag
+                else:
+                    dag = reverse_bidirectional_dag
+                sbs = BiDAGSabreSwap(bidag=dag, coupling_map=device, initial_mapping=initial_mapping, heuristic="basic", seed=0, trials=None)
+                routing = sbs.route()
+                final_mapping = routing.final_mapping()
 
-            #     if len(swaps) < lowest_layout_swap_count:
-            #         best_mapping = final_mapping
-            #         lowest_layout_swap_count = len(swaps)
+                if len(routing) < lowest_layout_swap_count:
+                    best_mapping = final_mapping
+                    lowest_layout_swap_count = len(routing)
 
-            #     initial_mapping = final_mapping
-            
+                initial_mapping = final_mapping
+
+        # for _ in range(self.layout_trials):
+        #     dag = bidirectional_dag
+    
+        #     sbs = BiDAGSabreSwap(bidag=dag, coupling_map=device, initial_mapping=initial_mapping, heuristic="basic", seed=0, trials=None)
+        #     swaps, final_mapping = sbs.run()
+
+        #     if len(swaps) < lowest_layout_swap_count:
+        #         best_mapping = final_mapping
+        #         lowest_layout_swap_count = len(swaps)
+
+        #     initial_mapping = final_mapping
         
-            print(f"SabreLayout with {self.layout_trials} layout trials found this initial mapping and swap count:")
-            print(best_mapping)
-            print(lowest_layout_swap_count)
 
-            # convert initial_mapping from int->int dict to int->Qubit dict
-            initial_mapping = {k: Qubit(register=QuantumRegister(size=self.count_physical_qubit, name='q'), index=v) for k, v in best_mapping.items()}
-            
-            left_swap_count, left_depth = apply_layout_and_generate_sabre_swaps(self.list_gate_qubits, self.list_qubit_edge, self.count_physical_qubit, initial_mapping, True, index, self.layout_trials, visualize=False)
-            right_swap_count, right_depth = apply_layout_and_generate_sabre_swaps(self.list_gate_qubits, self.list_qubit_edge, self.count_physical_qubit, initial_mapping, False, index, self.layout_trials, visualize=False)
+        print(f"SabreLayout with {self.layout_trials} layout trials found this initial mapping and swap count:")
+        print(best_mapping)
+        print(lowest_layout_swap_count)
 
-            results.append({'index': index, 'layout_swap_count': lowest_layout_swap_count, 'swap_count': left_swap_count + right_swap_count, 'depth': left_depth + right_depth})
-        return results
+        # convert initial_mapping from int->int dict to int->Qubit dict
+        initial_mapping = to_qubit_mapping(best_mapping, self.count_physical_qubit)
+        
+        # Qiskit routes each half in one uninterruptible call, so the running count
+        # is checked between the halves: swap counts are never negative, so a left
+        # half that reaches the incumbent leaves no room for the right half
+        left_swap_count, left_depth = apply_layout_and_generate_sabre_swaps(self.list_gate_qubits, self.list_qubit_edge, self.count_physical_qubit, initial_mapping, True, index, self.layout_trials)
+        if incumbent is not None and left_swap_count >= incumbent:
+            return {'index': index, 'layout_swap_count': lowest_layout_swap_count, 'swap_count': None, 'depth': None, 'pruned': True}
+        right_swap_count, right_depth = apply_layout_and_generate_sabre_swaps(self.list_gate_qubits, self.list_qubit_edge, self.count_physical_qubit, initial_mapping, False, index, self.layout_trials)
+
+        return {'index': index, 'layout_swap_count': lowest_layout_swap_count, 'swap_count': left_swap_count + right_swap_count, 'depth': left_depth + right_depth}
 
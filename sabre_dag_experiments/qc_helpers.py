@@ -7,6 +7,9 @@ from sabre_dag_experiments.sabre_layout import SabreLayout
 from qiskit.converters import circuit_to_dag, dag_to_circuit
 
 from sabre_dag_experiments.bidag_sabre_swap import BiDAGSabreSwap
+from sabre_dag_experiments.qubit_table import canonical_register
+from sabre_dag_experiments.device_context import device_context
+from sabre_dag_experiments.artifacts import NULL_ARTIFACTS, circuit_artifact, circuit_dag_artifact
 
 def partition_circuit(circuit_info, index):
     if index < 0 or index >= len(circuit_info):
@@ -16,7 +19,7 @@ def partition_circuit(circuit_info, index):
     return left, right
     
 def construct_qc(list_gate, count_physical_qubit): # list_gate is a tuple of lists
-    qc = QuantumCircuit(count_physical_qubit)
+    qc = QuantumCircuit(canonical_register(count_physical_qubit))
     for gate in list_gate:
         if len(gate) == 2:
             qc.cx(gate[0], gate[1])
@@ -28,7 +31,7 @@ def construct_qc(list_gate, count_physical_qubit): # list_gate is a tuple of lis
 
 # The purpose of this method is to draw the circuit without layers pushed left
 def construct_qc_with_barriers(list_gate, count_physical_qubit): # list_gate is a tuple of lists
-    qc = QuantumCircuit(count_physical_qubit)
+    qc = QuantumCircuit(canonical_register(count_physical_qubit))
     for gate in list_gate:
         if len(gate) == 2:
             qc.cx(gate[0], gate[1])
@@ -39,12 +42,12 @@ def construct_qc_with_barriers(list_gate, count_physical_qubit): # list_gate is
         qc.barrier()
     return qc
 
-def apply_layout_and_generate_sabre_swaps(circuit_info, coupling, count_physical_qubit, initial_mapping, left, index, layout_trials, visualize=False):
+def apply_layout_and_generate_sabre_swaps(circuit_info, coupling, count_physical_qubit, initial_mapping, left, index, layout_trials, artifacts=NULL_ARTIFACTS):
     if left:
       qc = construct_qc(reversed(circuit_info[:index]), count_physical_qubit)
     else:
       qc = construct_qc(circuit_info[index:], count_physical_qubit)
-    device = CouplingMap(couplinglist = coupling, description="sabre_test")
+    device = device_context(coupling).coupling_map
 
     # sbs = BiDAGSabreSwap(bidag=bidag, coupling_map=device, initial_mapping=initial_mapping, heuristic="basic", seed=None, trials=None)
     # swaps, final_mapping = sbs.run()
@@ -73,21 +76,16 @@ def apply_layout_and_generate_sabre_swaps(circuit_info, coupling, count_physical
     # # pm1 = PassManager(sbs)
     # sabre_cir = pm1.run(qc)
 
-    if visualize:
+    if artifacts.enabled:
         if left:
-            print(f"Drawing left circuit at bidag_index_{index}_left_circuit.png")
-            sabre_cir.draw(scale=0.7, filename=f"bidag_index_{index}_left_circuit.png", output='mpl', style='color', with_layout=True)
-            print(f"Drawing left (REVERSED) circuit at bidag_index_{index}_reverse_left_circuit.png")
-            sabre_cir.reverse_ops().draw(scale=0.7, filename=f"bidag_index_{index}_reverse_left_circuit.png", output='mpl', style='color', with_layout=True)
+            artifacts.add(circuit_artifact(f"bidag_index_{index}_left_circuit.png", sabre_cir, scale=0.7, output='mpl', style='color', with_layout=True))
+            artifacts.add(circuit_artifact(f"bidag_index_{index}_reverse_left_circuit.png", sabre_cir, reverse=True, scale=0.7, output='mpl', style='color', with_layout=True))
 
         else:
-            print(f"Drawing right circuit at bidag_index_{index}_right_circuit.png")
-            sabre_cir.draw(scale=0.7, filename=f"bidag_index_{index}_right_circuit.png", output='mpl', style='color', with_layout=True)
+            artifacts.add(circuit_artifact(f"bidag_index_{index}_right_circuit.png", sabre_cir, scale=0.7, output='mpl', style='color', with_layout=True))
 
-            right_qc_dag = circuit_to_dag(sabre_cir)
-            rev_right_qc_dag = right_qc_dag.reverse_ops()
-            right_qc_dag.draw(scale=0.7, filename=f"bidag_index_{index}_right_circuit_dag.png")
-            rev_right_qc_dag.draw(scale=0.7, filename=f"rev_bidag_index_{index}_right_circuit_dag.png")
+            artifacts.add(circuit_dag_artifact(f"bidag_index_{index}_right_circuit_dag.png", sabre_cir, scale=0.7))
+            artifacts.add(circuit_dag_artifact(f"rev_bidag_index_{index}_right_circuit_dag.png", sabre_cir, reverse=True, scale=0.7))
 
     
     count_swap = 0
@@ -97,25 +95,25 @@ def apply_layout_and_generate_sabre_swaps(circuit_info, coupling, count_physical
 
     return count_swap, sabre_cir.depth()
     
-def run_sabre(circuit_info, coupling, count_physical_qubit, heuristic, layout_trials):
+def run_sabre(circuit_info, coupling, count_physical_qubit, heuristic, layout_trials, artifacts=NULL_ARTIFACTS):
     # read qasm
     list_gate = circuit_info
     qc = construct_qc(list_gate, count_physical_qubit)
-    device = CouplingMap(couplinglist = coupling, description="sabre_test")
+    device = device_context(coupling).coupling_map
 
-    sabre_dag = circuit_to_dag(qc)
-    # Visualize sabre dag
-    sabre_dag.draw(scale=0.7, filename="basic_sabre_dag.png", style='color')
+    if artifacts.enabled:
+        # Visualize sabre dag
+        artifacts.add(circuit_dag_artifact("basic_sabre_dag.png", qc, scale=0.7, style='color'))
     
     sbl = SabreLayout(coupling_map = device, seed = 0, layout_trials=layout_trials)
     pass_manager1 = PassManager(sbl)
     sabre_cir = pass_manager1.run(qc)
-    sabre_cir_dag = circuit_to_dag(sabre_cir)
-    sabre_cir_dag.draw(scale=0.7, filename="sabre_cir_dag.png", style='color')
-    rev_sabre_cir_dag = sabre_cir_dag.reverse_ops()
-    rev_sabre_cir_dag.draw(scale=0.7, filename="rev_sabre_cir_dag.png", style='color')
+    if artifacts.enabled:
+        artifacts.add(circuit_dag_artifact("sabre_cir_dag.png", sabre_cir, scale=0.7, style='color'))
+        artifacts.add(circuit_dag_artifact("rev_sabre_cir_dag.png", sabre_cir, reverse=True, scale=0.7, style='color'))
     layout = pass_manager1.property_set['layout']
-    sabre_cir.draw(scale=0.7, filename="sabre_cir.png", output='mpl', style='color')
+    if artifacts.enabled:
+        artifacts.add(circuit_artifact("sabre_cir.png", sabre_cir, scale=0.7, output='mpl', style='color'))
     
     count_swap = 0
     for gate in sabre_cir.data:
@@ -0,0 +1,25 @@
+from functools import lru_cache
+from qiskit.circuit import QuantumRegister
+
+
+@lru_cache(maxsize=None)
+def canonical_register(count_physical_qubit):
+  """The process-wide QuantumRegister 'q' for a device with ``count_physical_qubit`` qubits.
+
+  Every BiDAG, QuantumCircuit and int->Qubit mapping conversion for that device
+  uses this register and its qubits, so the same physical qubit is always the same
+  Qubit object instead of one new register per qubit per build.
+  """
+  return QuantumRegister(size=count_physical_qubit, name='q')
+
+
+@lru_cache(maxsize=None)
+def canonical_qubits(count_physical_qubit):
+  """Tuple of the qubits of canonical_register(count_physical_qubit), by index."""
+  return tuple(canonical_register(count_physical_qubit))
+
+
+def to_qubit_mapping(mapping, count_physical_qubit):
+  """Convert an int->int mapping to int->Qubit using the canonical qubits."""
+  qubits = canonical_qubits(count_physical_qubit)
+  return {k: qubits[v] for k, v in mapping.items()}
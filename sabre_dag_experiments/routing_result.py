@@ -0,0 +1,48 @@
+import numpy as np
+
+
+class RoutingResult:
+  """Compact record of one BiDAGSabreSwap routing pass.
+
+  ``swaps`` is a (k, 2) array of the inserted swaps (physical qubits) and
+  ``swap_positions[i]`` the number of gates executed before swap ``i``. Together
+  with the initial mapping that is enough to replay the pass, so the routed
+  QuantumCircuit is only built when ``circuit()`` is called. ``aborted`` marks a
+  trial stopped by its swap budget, whose swaps and layout are partial.
+  """
+
+  def __init__(self, swaps, swap_positions, final_layout, initial_mapping, router=None, aborted=False):
+    self.swaps = np.asarray(swaps, dtype=np.int32).reshape(-1, 2)
+    self.swap_positions = np.asarray(swap_positions, dtype=np.int32)
+    self.final_layout = final_layout
+    self.initial_mapping = initial_mapping
+    self.router = router
+    self.aborted = aborted
+    self._circuit = None
+
+  def __len__(self):
+    return len(self.swaps)
+
+  def swap_list(self):
+    return [tuple(swap) for swap in self.swaps.tolist()]
+
+  def final_mapping(self):
+    return self.final_layout.to_dict()
+
+  def circuit(self):
+    """Return the routed circuit, materializing it on first use.
+
+    An aborted result holds partial swaps only and has no routed circuit.
+    """
+    if self.aborted:
+      raise RuntimeError("an aborted routing result has no routed circuit")
+    if self._circuit is None:
+      self._circuit = self.router.materialize(self)
+    return self._circuit
+
+  def __getstate__(self):
+    # results cross process boundaries without the router or a built circuit
+    state = self.__dict__.copy()
+    state["router"] = None
+    state["_circuit"] = None
+    return state
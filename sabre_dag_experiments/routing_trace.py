@@ -0,0 +1,131 @@
+import json
+from collections import namedtuple
+
+# One event per iteration of the BiDAGSabreSwap routing loop. An iteration either
+# executes gates (``executed`` non-empty) or inserts ``chosen_swap``, picked at
+# random from ``ties``, the best-scoring subset of ``candidates``. Gates and
+# swaps are given as tuples of qubit indices; ``mapping`` is the layout after a
+# swap and None on execute steps.
+StepEvent = namedtuple(
+  "StepEvent",
+  ("seed", "step", "front", "executed", "candidates", "ties", "chosen_swap", "mapping"),
+)
+
+
+class TraceSink:
+  """Receives routing events from BiDAGSabreSwap.
+
+  The router only builds events when ``enabled`` is true, so a disabled sink
+  costs one attribute check per routing trial.
+  """
+
+  enabled = True
+
+  def start(self, router, seed):
+    """Called before a routing trial starts."""
+
+  def step(self, event):
+    """Called with a StepEvent for every routing iteration."""
+
+  def finish(self, result):
+    """Called with the RoutingResult of a finished trial."""
+
+  def close(self):
+    """Release any resources held by the sink."""
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+
+class NullSink(TraceSink):
+  """Discards everything; the default sink."""
+
+  enabled = False
+
+
+NULL_SINK = NullSink()
+
+
+class CounterSink(TraceSink):
+  """Aggregates event counts across all trials it sees."""
+
+  def __init__(self):
+    self.counts = {
+      "trials": 0,
+      "steps": 0,
+      "execute_steps": 0,
+      "swap_steps": 0,
+      "gates_executed": 0,
+      "candidates_scored": 0,
+      "ties": 0,
+      "max_front_size": 0,
+    }
+
+  def start(self, router, seed):
+    self.counts["trials"] += 1
+
+  def step(self, event):
+    counts = self.counts
+    counts["steps"] += 1
+    counts["max_front_size"] = max(counts["max_front_size"], len(event.front))
+    if event.chosen_swap is None:
+      counts["execute_steps"] += 1
+      counts["gates_executed"] += len(event.executed)
+    else:
+      counts["swap_steps"] += 1
+      counts["candidates_scored"] += len(event.candidates)
+      counts["ties"] += len(event.ties)
+
+
+class JsonlTraceSink(TraceSink):
+  """Writes one JSON object per routing step to ``path``."""
+
+  def __init__(self, path):
+    self.path = path
+    self._file = None
+
+  def start(self, router, seed):
+    if self._file is None:
+      self._file = open(self.path, "a")
+
+  def step(self, event):
+    record = {
+      "seed": event.seed,
+      "step": event.step,
+      "front_size": len(event.front),
+      "executed": len(event.executed),
+      "candidates": len(event.candidates),
+      "ties": [list(swap) for swap in event.ties],
+      "chosen_swap": list(event.chosen_swap) if event.chosen_swap is not None else None,
+    }
+    self._file.write(json.dumps(record, default=int) + "\n")
+
+  def close(self):
+    if self._file is not None:
+      self._file.close()
+      self._file = None
+
+
+class PrintSink(TraceSink):
+  """The router's former debug output: prints each step to stdout."""
+
+  def start(self, router, seed):
+    print("distance matrix:")
+    print(router.dist_matrix)
+    print("neighbor table")
+    print(router.neighbors)
+    print("mutable_mapping")
+    print(router.initial_mapping)
+
+  def step(self, event):
+    print(f"F: {list(event.front)}")
+    print(f"execute_gate_list: {list(event.executed)}")
+    if event.chosen_swap is not None:
+      print("swap candidates")
+      print(set(event.candidates))
+      print(f"chosen swap: {event.chosen_swap}")
+      print("new mapping")
+      print(event.mapping)
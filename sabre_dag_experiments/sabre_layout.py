@@ -44,6 +44,7 @@ from qiskit.transpiler.passes.routing.sabre_swap import _build_sabre_dag, _apply
 from qiskit.transpiler.target import Target
 from qiskit.transpiler.coupling import CouplingMap
 from qiskit.tools.parallel import CPU_COUNT
+from sabre_dag_experiments.device_context import device_context
 
 logger = logging.getLogger(__name__)
 
@@ -191,7 +192,7 @@ class SabreLayout(TransformationPass):
                 if isinstance(coupling_map, CouplingMap):
                     self.coupling_map = copy.deepcopy(self.coupling_map)
                 self.coupling_map.make_symmetric()
-            self._neighbor_table = NeighborTable(rx.adjacency_matrix(self.coupling_map.graph))
+            self._neighbor_table = device_context(self.coupling_map).neighbor_table
 
     def run(self, dag):
         """Run the SabreLayout pass on `dag`.
@@ -358,8 +359,10 @@ class SabreLayout(TransformationPass):
             # constraints
             coupling_map = copy.deepcopy(coupling_map)
             coupling_map.make_symmetric()
-        neighbor_table = NeighborTable(rx.adjacency_matrix(coupling_map.graph))
-        dist_matrix = coupling_map.distance_matrix
+        # shared per device instead of recomputed for every run
+        context = device_context(coupling_map)
+        neighbor_table = context.neighbor_table
+        dist_matrix = context.dist_matrix
         original_qubit_indices = {bit: index for index, bit in enumerate(dag.qubits)}
         partial_layouts = []
         if starting_layouts is not None:
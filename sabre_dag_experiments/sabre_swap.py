@@ -38,6 +38,7 @@ from qiskit._accelerate.sabre_swap import (
     SabreDAG,
 )
 from qiskit._accelerate.nlayout import NLayout
+from sabre_dag_experiments.device_context import device_context
 
 logger = logging.getLogger(__name__)
 
@@ -161,9 +162,7 @@ class SabreSwap(TransformationPass):
             self.coupling_map.make_symmetric()
         self._neighbor_table = None
         if self.coupling_map is not None:
-            self._neighbor_table = NeighborTable(
-                rustworkx.adjacency_matrix(self.coupling_map.graph)
-            )
+            self._neighbor_table = device_context(self.coupling_map).neighbor_table
 
         self.heuristic = heuristic
         self.seed = seed
@@ -223,7 +222,7 @@ class SabreSwap(TransformationPass):
             dag, self.coupling_map if self.target is None else self.target
         )
 
-        self.dist_matrix = self.coupling_map.distance_matrix
+        self.dist_matrix = device_context(self.coupling_map).dist_matrix
 
         canonical_register = dag.qregs["q"]
         current_layout = self.property_set["layout"]
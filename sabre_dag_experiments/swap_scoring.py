@@ -0,0 +1,88 @@
+import numpy as np
+from collections import defaultdict
+
+
+class DeltaCost:
+  """Running 'basic' cost of a set of two-qubit gates under a BiDAGLayout.
+
+  Keeps the summed ``dist_matrix`` distance of the tracked gates and an index from
+  each logical qubit to the tracked gates acting on it. A swap only moves the two
+  logical qubits on the swapped physical qubits, so it is scored from the gates in
+  their index entries, O(degree) instead of O(len(gates)).
+
+  Gates are added and removed as they enter and leave the tracked set, and
+  ``apply`` must be called before the layout itself is swapped.
+  """
+
+  def __init__(self, dist_matrix):
+    self.dist_matrix = dist_matrix
+    self.cost = 0
+    self._qubits = {}
+    self._gates_on = defaultdict(dict)
+
+  def __len__(self):
+    return len(self._qubits)
+
+  def __contains__(self, gate):
+    return gate in self._qubits
+
+  def add(self, gate, q_i, q_j, layout):
+    self._qubits[gate] = (q_i, q_j)
+    self._gates_on[q_i][gate] = None
+    self._gates_on[q_j][gate] = None
+    self.cost += self.dist_matrix[layout.v2p[q_i], layout.v2p[q_j]]
+
+  def remove(self, gate, layout):
+    q_i, q_j = self._qubits.pop(gate)
+    del self._gates_on[q_i][gate]
+    del self._gates_on[q_j][gate]
+    self.cost -= self.dist_matrix[layout.v2p[q_i], layout.v2p[q_j]]
+
+  def delta(self, swap, layout):
+    """Change in cost if ``swap`` were applied to ``layout``."""
+    Q_a, Q_b = swap
+    v2p, p2v = layout.v2p, layout.p2v
+    affected = {}
+    for logical in (p2v[Q_a], p2v[Q_b]):
+      if logical >= 0:
+        affected.update(self._gates_on.get(logical, ()))
+
+    delta = 0
+    for gate in affected:
+      q_i, q_j = self._qubits[gate]
+      Q_m, Q_n = v2p[q_i], v2p[q_j]
+      old = self.dist_matrix[Q_m, Q_n]
+      Q_m = Q_b if Q_m == Q_a else Q_a if Q_m == Q_b else Q_m
+      Q_n = Q_b if Q_n == Q_a else Q_a if Q_n == Q_b else Q_n
+      delta += self.dist_matrix[Q_m, Q_n] - old
+    return delta
+
+  def score(self, swap, layout):
+    """Cost of the tracked gates if ``swap`` were applied to ``layout``."""
+    return self.cost + self.delta(swap, layout)
+
+  def apply(self, swap, layout):
+    """Account for ``swap`` before it is applied to ``layout``."""
+    self.cost += self.delta(swap, layout)
+
+
+def batch_score_swaps(swap_candidates, front_qubits, layout, dist_matrix):
+  """Score every candidate swap against a gate set in one NumPy pass.
+
+  Args:
+    swap_candidates: (k, 2) int array of physical qubit pairs.
+    front_qubits: (|F|, 2) int array of the logical qubits of each two-qubit gate.
+    layout: the current BiDAGLayout.
+    dist_matrix: the coupling map distance matrix.
+
+  Returns:
+    (costs, ties): the (k,) 'basic' cost of each candidate and the indices of the
+    candidates attaining the minimum, in candidate order.
+  """
+  physical = layout.v2p[front_qubits][np.newaxis, :, :]
+  Q_a = swap_candidates[:, 0, np.newaxis, np.newaxis]
+  Q_b = swap_candidates[:, 1, np.newaxis, np.newaxis]
+  swapped = np.where(physical == Q_a, Q_b, np.where(physical == Q_b, Q_a, physical))
+  costs = dist_matrix[swapped[:, :, 0], swapped[:, :, 1]].sum(axis=1)
+  ties = np.flatnonzero(costs == costs.min())
+  return costs, ties
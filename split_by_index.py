@@ -2,28 +2,44 @@ import argparse
 import json
 from sabre_dag_experiments.device import qcdevice
 from sabre_dag_experiments.driver import Driver
+from sabre_dag_experiments.checkpoint import SweepCheckpoint, summarize_sweep
+from sabre_dag_experiments.artifacts import NULL_ARTIFACTS, BackgroundRenderer, SnapshotWriter
 from device_creation import get_nnGrid, get_device_by_name
 '''
     How to run:
     python3 split_by_index.py --dt grid --d 4 --f example/ --qf benchmark/qaoa/qaoa_16_0.qasm --layout_trials 1
 '''
 
-def build_bidirectional_initial_mappings_for_all_indices(circuit_info, circuit_name, device_name, device, layout_trials):
-    lsqc_solver = Driver(layout_trials)
+def build_bidirectional_initial_mappings_for_all_indices(circuit_info, circuit_name, device_name, device, layout_trials, workers=1, swap_bound=None, checkpoint=None, artifacts=NULL_ARTIFACTS):
+    lsqc_solver = Driver(layout_trials, workers)
+    lsqc_solver.set_artifact_sink(artifacts)
     lsqc_solver.set_circuit_name(circuit_name)
     lsqc_solver.set_device_name(device_name)
+    lsqc_solver.set_swap_upper_bound(swap_bound)
     lsqc_solver.setprogram(circuit_info)
     lsqc_solver.setdevice(device)
-    return lsqc_solver.build_bidirectional_initial_mappings_for_all_indices()
+    return lsqc_solver.build_bidirectional_initial_mappings_for_all_indices(checkpoint)
 
-def run_basic_sabre(circuit_info, device, layout_trials):
+def search_bidirectional_initial_mappings(circuit_info, circuit_name, device_name, device, layout_trials, budget, workers=1, swap_bound=None, checkpoint=None, artifacts=NULL_ARTIFACTS):
+    lsqc_solver = Driver(layout_trials, workers)
+    lsqc_solver.set_artifact_sink(artifacts)
+    lsqc_solver.set_circuit_name(circuit_name)
+    lsqc_solver.set_device_name(device_name)
+    lsqc_solver.set_swap_upper_bound(swap_bound)
+    lsqc_solver.setprogram(circuit_info)
+    lsqc_solver.setdevice(device)
+    return lsqc_solver.search_indices(budget, checkpoint=checkpoint)
+
+def run_basic_sabre(circuit_info, device, layout_trials, artifacts=NULL_ARTIFACTS):
     lsqc_solver = Driver(layout_trials)
+    lsqc_solver.set_artifact_sink(artifacts)
     lsqc_solver.setprogram(circuit_info)
     lsqc_solver.setdevice(device)
     return lsqc_solver.get_swap_upper_bound(heuristic="basic")
 
-def build_bidirectional_initial_mapping(circuit_info, circuit_name, device_name, device, layout_trials, index, initial_layout):
+def build_bidirectional_initial_mapping(circuit_info, circuit_name, device_name, device, layout_trials, index, initial_layout, artifacts=NULL_ARTIFACTS):
     lsqc_solver = Driver(layout_trials)
+    lsqc_solver.set_artifact_sink(artifacts)
     lsqc_solver.set_circuit_name(circuit_name)
     lsqc_solver.set_device_name(device_name)
     lsqc_solver.setprogram(circuit_info)
@@ -58,6 +74,14 @@ if __name__ == "__main__":
         help="sabre layout trials")
     parser.add_argument("--index", dest="index", default=-1, type=int,
         help="sabre layout trials")
+    parser.add_argument("--workers", dest="workers", type=int, default=1,
+        help="processes for the all-indices sweep, 0 for one per core")
+    parser.add_argument("--search_budget", dest="search_budget", type=int, default=0,
+        help="with --index -1, evaluate at most this many indices with a coarse-to-fine search, 0 for all indices")
+    parser.add_argument("--artifacts", dest="artifacts", type=str, default="none", choices=["none", "render", "snapshot"],
+        help="images of the run: none, render them in background processes, or snapshot them for render_artifacts.py")
+    parser.add_argument("--prune", action='store_true', default=False,
+        help="with --index -1, abandon indices that cannot beat the best swap count so far, starting from --swap_bound or basic sabre")
     # Read arguments from command line
     
     args = parser.parse_args()
@@ -76,45 +100,67 @@ if __name__ == "__main__":
     b_file = b_file.split('/')
     b_file = b_file[-1]
 
-    if args.index == -1:
-        file_name = args.folder+"/"+str(args.device_type)+"_"+b_file+"_trials_"+str(args.layout_trials)+".json"
+    # pruned sweeps keep their own output and checkpoint, apart from the full sweep
+    prune_suffix = ""
+    if args.prune:
+        prune_suffix = "_prune" if args.swap_bound < 0 else "_prune_"+str(args.swap_bound)
+    if args.index == -1 and args.search_budget > 0:
+        file_name = args.folder+"/"+str(args.device_type)+"_"+b_file+"_trials_"+str(args.layout_trials)+"_search_"+str(args.search_budget)+prune_suffix+".json"
+    elif args.index == -1:
+        file_name = args.folder+"/"+str(args.device_type)+"_"+b_file+"_trials_"+str(args.layout_trials)+prune_suffix+".json"
     else:
         file_name = args.folder+"/"+str(args.device_type)+"_"+b_file+"_trials_"+str(args.layout_trials)+"_index_"+str(args.index)+".json"
 
     # layout_trials = args.layout_trials
 # print(f"layout_trials is {layout_trials}")
 
-    basic_sabre_swap_count, depth, initial_layout = run_basic_sabre(circuit_info, device, args.layout_trials)
+    # images are rendered off the compute path, after or alongside it
+    if args.artifacts == "render":
+        artifacts = BackgroundRenderer(workers=args.workers or None)
+    elif args.artifacts == "snapshot":
+        artifacts = SnapshotWriter()
+    else:
+        artifacts = NULL_ARTIFACTS
+
+    basic_sabre_swap_count, depth, initial_layout = run_basic_sabre(circuit_info, device, args.layout_trials, artifacts)
+    swap_bound = None
+    if args.prune:
+        swap_bound = args.swap_bound if args.swap_bound >= 0 else basic_sabre_swap_count
 
     if args.index == -1:
-        result = build_bidirectional_initial_mappings_for_all_indices(circuit_info, circuit_name, device_name, device, args.layout_trials)
+        # per-index results stream to a .jsonl next to the .json; rerunning the
+        # same sweep resumes from it
+        key = {"circuit": circuit_name, "device": device_name, "layout_trials": args.layout_trials, "swap_bound": swap_bound}
+        try:
+            checkpoint = SweepCheckpoint(file_name[:-len(".json")] + ".jsonl", key)
+        except ValueError as error:
+            artifacts.close()
+            parser.exit(1, f"Cannot resume the sweep: {error}. Remove the checkpoint to start over.\n")
+        with checkpoint:
+            if args.search_budget > 0:
+                result = search_bidirectional_initial_mappings(circuit_info, circuit_name, device_name, device, args.layout_trials, args.search_budget, args.workers or None, swap_bound, checkpoint, artifacts)
+            else:
+                result = build_bidirectional_initial_mappings_for_all_indices(circuit_info, circuit_name, device_name, device, args.layout_trials, args.workers or None, swap_bound, checkpoint, artifacts)
     else:
-        result = build_bidirectional_initial_mapping(circuit_info, circuit_name, device_name, device, args.layout_trials, args.index, initial_layout)
+        result = build_bidirectional_initial_mapping(circuit_info, circuit_name, device_name, device, args.layout_trials, args.index, initial_layout, artifacts)
 
     data["device"] = str(args.device)
     data["circuit"] = circuit_name
     data["layout_trials"] = args.layout_trials
     data["basic_sabre"] = {'swap_count': basic_sabre_swap_count, 'depth': depth}
     data["result"] = result
-    
+    if args.index == -1 and args.search_budget > 0:
+        data["search_budget"] = args.search_budget
+        data["evaluated_indices"] = [r["index"] for r in result]
+
+    if args.index == -1 and args.prune:
+        data["swap_bound"] = swap_bound
+        data["pruned_indices"] = [r["index"] for r in result if r.get("pruned", False)]
+
     if args.index == -1:
-        lowest_swap = highest_swap = result[0]["swap_count"]
-        lowest_layout_swap_count = result[0]["layout_swap_count"]
-        lowest_idx = highest_idx = 0
-        lowest_layout_swap_count_idx = 0
-        for i in range(1, len(result)):
-            if result[i]["swap_count"] > highest_swap:
-                highest_swap = result[i]["swap_count"]
-                highest_idx = i
-            if result[i]["swap_count"] < lowest_swap:
-                lowest_swap = result[i]["swap_count"]
-                lowest_idx = i
-            if result[i]["layout_swap_count"] < lowest_layout_swap_count:
-                lowest_layout_swap_count = result[i]["swap_count"]
-                lowest_layout_swap_count_idx = i
-        data["lowest_result"] = result[lowest_idx]
-        data["highest_result"] = result[highest_idx]
-        data["lowest_layout_swap_count_result"] = result[lowest_layout_swap_count_idx]
+        data.update(summarize_sweep(result))
 
     with open(file_name, 'w') as file_object:
         json.dump(data, file_object, default=int)
+
+    artifacts.close()
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+from qiskit.transpiler import CouplingMap
+
+from device_creation import get_nnGrid
+from sabre_dag_experiments.bidag_sabre_swap import BiDAGSabreSwap
+from sabre_dag_experiments.dag_helpers import construct_bidirectional_dagcircuit
+from sabre_dag_experiments.input import input_qasm
+
+QASM = os.path.join(os.path.dirname(__file__), "..", "benchmark", "qaoa", "qaoa_16_0.qasm")
+
+
+def make_router(**kwargs):
+  device = get_nnGrid(4, 1)
+  with open(QASM) as file:
+    _, gates, _ = input_qasm(file.read())
+  bidag = construct_bidirectional_dagcircuit(gates, device.count_physical_qubit, len(gates) // 3)
+  initial_mapping = {k: k for k in range(device.count_physical_qubit)}
+  return BiDAGSabreSwap(bidag=bidag, coupling_map=CouplingMap(couplinglist=device.list_qubit_edge),
+                        initial_mapping=initial_mapping, seed=2, **kwargs)
+
+
+def test_small_swap_budget_terminates():
+  router = make_router(swap_budget=2)
+  result = router.route()
+  assert result.aborted
+  assert len(result) == 3
+  with pytest.raises(RuntimeError):
+    router.run()
+  with pytest.raises(RuntimeError):
+    result.circuit()
+  # replaying the partial swaps directly must stop too, not spin on a blocked front layer
+  with pytest.raises(RuntimeError):
+    router.materialize(result)
+
+
+def test_unbounded_run_materializes():
+  swaps, _, circuit = make_router().run()
+  assert circuit.count_ops().get("swap", 0) == len(swaps)